@@ -1,7 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from contextlib import asynccontextmanager
 from routers import chat  # 절대 임포트
+from services.pipeline_state import pipeline_state
+from services.metrics import collect_pipeline_state, render_metrics
 import uvicorn
+import asyncio
 import logging
 from datetime import datetime
 
@@ -9,10 +14,19 @@ from datetime import datetime
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 모델 로딩은 백그라운드에서 진행하고 포트는 바로 연다 (준비 여부는 /health/ready)
+    load_task = asyncio.create_task(pipeline_state.load())
+    yield
+    if not load_task.done():
+        load_task.cancel()
+
 app = FastAPI(
     title="ProjectOldMan RAG Chat API",
     description="중장년층을 위한 카테고리별 RAG 챗봇 API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS 설정
@@ -35,48 +49,28 @@ async def root():
         "docs": "/docs"
     }
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness: 프로세스가 요청에 응답할 수 있는지 (모델 로딩 여부와 무관)"""
+    return {"status": "alive", "pipeline": pipeline_state.status}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness: 모델 로딩이 끝나 트래픽을 받을 수 있는지 (준비 전에는 503)"""
+    state = pipeline_state.get_status()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
 @app.get("/health")
 async def health_check():
-    """전체 시스템 헬스체크 - 개선된 버전"""
-    try:
-        # 기본 상태 반환 (RAG Pipeline 없이도 작동)
-        basic_status = {
-            "status": "healthy",
-            "message": "API server is running",
-            "timestamp": str(datetime.now()),
-            "model": "Unknown",
-            "model_status": "checking"
-        }
-        
-        # RAG Pipeline 초기화 시도 (실패해도 기본 상태 반환)
-        try:
-            from services.rag_pipeline import RAGPipeline
-            rag_pipeline = RAGPipeline()
-            model_info = rag_pipeline.llm_manager.get_model_info()
-            
-            basic_status.update({
-                "model": model_info["name"],
-                "model_status": model_info["status"],
-                "message": "All systems operational"
-            })
-        except Exception as rag_error:
-            logger.warning(f"RAG Pipeline check failed: {rag_error}")
-            basic_status.update({
-                "model": "Not loaded",
-                "model_status": "error",
-                "message": f"API running, model loading: {str(rag_error)[:100]}"
-            })
-        
-        return basic_status
-        
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return {
-            "status": "error",
-            "message": f"System error: {str(e)}",
-            "model": "Unknown",
-            "model_status": "error"
-        }
+    """전체 시스템 헬스체크 (공유 파이프라인 상태를 읽기만 함)"""
+    return JSONResponse(content={**pipeline_state.get_health(), "timestamp": str(datetime.now())})
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 스크레이프 엔드포인트 (prometheus.yml의 ai-backend job)"""
+    collect_pipeline_state(pipeline_state)
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
 
 if __name__ == "__main__":
     logger.info("🚀 Starting ProjectOldMan RAG Chat API server...")
@@ -1,10 +1,24 @@
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
-from services.rag_pipeline import RAGPipeline  # 상대 임포트 → 절대 임포트
+from services.pipeline_state import pipeline_state, PipelineNotReadyError
+from services.llm_manager import InferenceRejectedError, QueueFullError
+from services.context_budget import PromptTooLongError
 
 router = APIRouter()
-rag_pipeline = RAGPipeline()
+
+def get_rag_pipeline():
+    """공유 RAGPipeline 조회 (백그라운드 로딩이 끝나기 전에는 503)"""
+    try:
+        return pipeline_state.get_pipeline()
+    except PipelineNotReadyError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
 
 class ChatRequest(BaseModel):
     message: str
@@ -18,6 +32,7 @@ class ChatResponse(BaseModel):
 @router.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     """Chat endpoint with RAG pipeline"""
+    rag_pipeline = get_rag_pipeline()
     try:
         response = await rag_pipeline.process_query(
             query=request.message,
@@ -25,12 +40,50 @@ async def chat_endpoint(request: ChatRequest):
             user_id=request.user_id
         )
         return ChatResponse(**response)
+    except InferenceRejectedError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except PromptTooLongError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """Chat endpoint with token streaming (Server-Sent Events)"""
+    rag_pipeline = get_rag_pipeline()
+    # 스트림을 열기 전에 대기열 여유를 확인해 과부하 시 바로 429 반환
+    if not rag_pipeline.llm_manager.has_capacity():
+        raise HTTPException(
+            status_code=QueueFullError.status_code,
+            detail="추론 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": "1"}
+        )
+
+    async def event_source():
+        async for event in rag_pipeline.process_query_stream(
+            query=request.message,
+            category=request.category,
+            user_id=request.user_id
+        ):
+            yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # nginx 버퍼링 비활성화
+        }
+    )
+
 @router.get("/model-info")
 async def get_model_info():
     """현재 사용 중인 LLM 모델 정보 조회"""
+    rag_pipeline = get_rag_pipeline()
     try:
         model_info = rag_pipeline.llm_manager.get_model_info()
         return {
@@ -44,6 +97,7 @@ async def get_model_info():
 @router.post("/reload-model")
 async def reload_model():
     """모델 재로딩"""
+    rag_pipeline = get_rag_pipeline()
     try:
         success = rag_pipeline.llm_manager.reload_model()
         if success:
@@ -64,18 +118,4 @@ async def reload_model():
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
-    try:
-        model_info = rag_pipeline.llm_manager.get_model_info()
-        return {
-            "status": "healthy",
-            "message": "RAG Chat API is running",
-            "model": model_info["name"],
-            "model_status": model_info["status"]
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "message": f"Health check failed: {str(e)}",
-            "model": "Unknown",
-            "model_status": "error"
-        }
+    return pipeline_state.get_health()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+카테고리 분류 키워드 매칭 비교 스크립트
+
+카테고리 × 키워드마다 `keyword in text`를 확인하던 기존 루프와
+CategoryRouter의 Aho-Corasick 매처를 키워드 수별로 비교한다.
+두 방식의 카테고리 점수가 모든 쿼리에서 같은지 확인하고, 쿼리당 지연시간(p50/p99)과
+매처 컴파일 시간을 출력한다. 키워드는 기본 목록에 합성 키워드를 덧붙여 늘린다.
+
+예) python scripts/benchmark_category_router.py --keywords-per-category 50 500 5000
+"""
+
+import sys
+import time
+import random
+import argparse
+import logging
+from pathlib import Path
+
+import numpy as np
+
+# 백엔드 경로 추가
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.category_router import CategoryRouter
+from services.keyword_matcher import AHOCORASICK_AVAILABLE
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# 합성 키워드/쿼리에 쓸 한글 음절 범위 (가~힣)
+HANGUL_START, HANGUL_END = 0xAC00, 0xD7A3
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="카테고리 키워드 매칭: 기존 루프 vs Aho-Corasick")
+    parser.add_argument("--keywords-per-category", type=int, nargs="+", default=[30, 300, 3000],
+                        help="카테고리당 키워드 수 (기본 목록 포함, 여러 개 지정 가능)")
+    parser.add_argument("--num-queries", type=int, default=2000, help="쿼리 수")
+    parser.add_argument("--query-chars", type=int, default=60, help="쿼리 길이 (글자)")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+def random_word(rng: random.Random, min_len: int = 2, max_len: int = 4) -> str:
+    return "".join(chr(rng.randint(HANGUL_START, HANGUL_END)) for _ in range(rng.randint(min_len, max_len)))
+
+
+def make_keywords(base: dict, per_category: int, rng: random.Random) -> dict:
+    keywords = {category: list(words) for category, words in base.items()}
+    for words in keywords.values():
+        while len(words) < per_category:
+            words.append(random_word(rng))
+    return keywords
+
+
+def make_queries(keywords: dict, num_queries: int, query_chars: int, rng: random.Random) -> list:
+    """무작위 음절 사이에 키워드 0~3개를 섞은 쿼리"""
+    all_keywords = [word for words in keywords.values() for word in words]
+    queries = []
+    for _ in range(num_queries):
+        parts = [random_word(rng, 1, 3) for _ in range(query_chars // 3)]
+        for _ in range(rng.randint(0, 3)):
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(all_keywords))
+        queries.append(" ".join(parts)[:query_chars * 2])
+    return queries
+
+
+def legacy_scores(keywords: dict, text: str) -> dict:
+    """기존 CategoryRouter 방식 (카테고리 × 키워드마다 부분 문자열 검사)"""
+    text_lower = text.lower()
+    scores = {}
+    for category, words in keywords.items():
+        score = 0
+        for keyword in words:
+            if keyword in text_lower:
+                score += 1
+        scores[category] = score
+    return scores
+
+
+def timed(fn, queries: list):
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(fn(query))
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return results, np.array(latencies)
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    base = CategoryRouter(keywords_path="").keywords
+
+    print(f"매처 구현: {'pyahocorasick' if AHOCORASICK_AVAILABLE else '순수 파이썬'}, "
+          f"쿼리 {args.num_queries}개 × {args.query_chars}자\n")
+    print(f"{'키워드/카테고리':>14} {'방식':>10} {'p50(µs)':>10} {'p99(µs)':>10} {'컴파일(ms)':>11} {'일치':>6}")
+    for per_category in args.keywords_per_category:
+        keywords = make_keywords(base, per_category, rng)
+        queries = make_queries(keywords, args.num_queries, args.query_chars, rng)
+
+        start = time.perf_counter()
+        router = CategoryRouter(keywords=keywords, keywords_path="")
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        legacy_results, legacy_latency = timed(lambda q: legacy_scores(keywords, q), queries)
+        matcher_results, matcher_latency = timed(router.score, queries)
+        agreement = sum(
+            legacy == {category: int(score) for category, score in matched.items()}
+            for legacy, matched in zip(legacy_results, matcher_results)
+        ) / len(queries)
+
+        for name, latency, build_ms in (("loop", legacy_latency, None), ("automaton", matcher_latency, compile_ms)):
+            build = f"{build_ms:11.1f}" if build_ms is not None else f"{'-':>11}"
+            print(f"{per_category:>14} {name:>10} {np.percentile(latency, 50):10.1f} "
+                  f"{np.percentile(latency, 99):10.1f} {build} {agreement:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+임베딩 추론 백엔드(ONNX / int8 양자화) 내보내기 및 기준 모델과의 일치도 검증 스크립트
+
+--export: 기준 SentenceTransformer 모델을 ONNX로 내보내고 onnxruntime 동적 int8
+          양자화본까지 만든다 (EMBEDDING_ONNX_PATH 기본 위치).
+검증: 코퍼스(샘플 문서 + 질의)에 대해 기준 torch 모델 대비 코사인 유사도,
+      top-k 검색 결과 일치율, 배치 1 지연시간을 백엔드별로 출력한다.
+      최소 코사인이 --min-cosine보다 낮으면 종료 코드 1.
+
+예) python scripts/check_embedding_backend.py --export
+    EMBEDDING_BACKEND=onnx uvicorn main:app ...
+"""
+
+import sys
+import json
+import time
+import argparse
+import logging
+from pathlib import Path
+
+import numpy as np
+
+# 백엔드 경로 추가
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.embedding import OnnxSentenceEncoder, EMBEDDING_ONNX_PATH
+from scripts.generate_vector_data import SAMPLE_DATA
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_QUERIES = [
+    "혈압이 높은데 어떻게 관리해야 하나요?",
+    "당뇨 예방에 좋은 운동은 무엇인가요?",
+    "제주도 여행 코스를 추천해 주세요",
+    "노후 자금은 어떻게 준비해야 할까요?",
+    "상속 절차가 궁금합니다",
+    "무릎이 아플 때 할 수 있는 운동이 있나요?",
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="임베딩 백엔드 내보내기/일치도 검증")
+    parser.add_argument("--model", default="jhgan/ko-sroberta-multitask", help="기준 SentenceTransformer 모델")
+    parser.add_argument("--onnx-dir", default=str(Path(EMBEDDING_ONNX_PATH).parent), help="ONNX 모델 디렉토리")
+    parser.add_argument("--export", action="store_true", help="ONNX 내보내기 + int8 양자화 수행")
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx-int8", "torch-int8"],
+                        choices=["onnx", "onnx-int8", "torch-int8"], help="검증할 백엔드")
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="허용 최소 코사인 유사도")
+    parser.add_argument("--top-k", type=int, default=3)
+    return parser.parse_args()
+
+
+def export_onnx(reference, model_name: str, onnx_dir: Path):
+    """SentenceTransformer의 트랜스포머 본체를 ONNX로 내보내고 int8 양자화본 생성"""
+    import torch
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    onnx_dir.mkdir(parents=True, exist_ok=True)
+    transformer = reference[0]
+    tokenizer, auto_model = transformer.tokenizer, transformer.auto_model
+    auto_model.eval()
+
+    sample = tokenizer(["온천 여행지를 추천해 주세요"], return_tensors="pt")
+    input_names = list(sample.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = onnx_dir / "model.onnx"
+    logger.info(f"🔄 ONNX 내보내기: {fp32_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            auto_model,
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    int8_path = onnx_dir / "model.int8.onnx"
+    logger.info(f"🔄 int8 동적 양자화: {int8_path}")
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(str(onnx_dir))
+    config = {"model_name": model_name, "max_seq_length": reference.max_seq_length, "quantized": True}
+    (onnx_dir / "onnx_config.json").write_text(json.dumps(config, ensure_ascii=False, indent=2), encoding="utf-8")
+    logger.info("✅ ONNX 내보내기 완료")
+
+
+def load_candidate(backend: str, reference_name: str, onnx_dir: Path):
+    if backend == "onnx":
+        return OnnxSentenceEncoder(str(onnx_dir / "model.onnx"))
+    if backend == "onnx-int8":
+        return OnnxSentenceEncoder(str(onnx_dir / "model.int8.onnx"))
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(reference_name, device="cpu")
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def encode(model, texts):
+    return np.asarray(model.encode(texts, convert_to_numpy=True, normalize_embeddings=True), dtype=np.float32)
+
+
+def single_latency_ms(model, texts):
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        encode(model, [text])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def top_k_agreement(reference_docs, reference_queries, docs, queries, k: int) -> float:
+    """질의별 top-k 문서 집합이 기준 모델과 겹치는 비율"""
+    ref_top = np.argsort(-reference_queries @ reference_docs.T, axis=1)[:, :k]
+    cand_top = np.argsort(-queries @ docs.T, axis=1)[:, :k]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)]))
+
+
+def main():
+    args = parse_args()
+    from sentence_transformers import SentenceTransformer
+
+    onnx_dir = Path(args.onnx_dir)
+    reference = SentenceTransformer(args.model, device="cpu")
+    if args.export:
+        export_onnx(reference, args.model, onnx_dir)
+
+    corpus = [doc["text"] for docs in SAMPLE_DATA.values() for doc in docs]
+    reference_docs = encode(reference, corpus)
+    reference_queries = encode(reference, SAMPLE_QUERIES)
+    reference_latency = single_latency_ms(reference, SAMPLE_QUERIES * 5)
+
+    rows = [("torch", 1.0, 1.0, 1.0, reference_latency)]
+    passed = True
+    for backend in args.backends:
+        try:
+            model = load_candidate(backend, args.model, onnx_dir)
+        except Exception as e:
+            logger.warning(f"⚠️ {backend} 로딩 실패, 건너뜀: {e}")
+            continue
+        docs = encode(model, corpus)
+        queries = encode(model, SAMPLE_QUERIES)
+        cosines = np.concatenate([
+            np.einsum("ij,ij->i", docs, reference_docs),
+            np.einsum("ij,ij->i", queries, reference_queries),
+        ])
+        agreement = top_k_agreement(reference_docs, reference_queries, docs, queries, args.top_k)
+        rows.append((backend, float(cosines.mean()), float(cosines.min()), agreement,
+                     single_latency_ms(model, SAMPLE_QUERIES * 5)))
+        if cosines.min() < args.min_cosine:
+            passed = False
+
+    print()
+    print(f"{'backend':<11} {'mean cos':>9} {'min cos':>9} {f'top{args.top_k} agree':>11} {'p50(ms)':>9} {'speedup':>8}")
+    print("-" * 62)
+    reference_p50 = np.percentile(reference_latency, 50)
+    for backend, mean_cos, min_cos, agreement, latency in rows:
+        p50 = np.percentile(latency, 50)
+        print(f"{backend:<11} {mean_cos:>9.4f} {min_cos:>9.4f} {agreement:>11.2f} {p50:>9.2f} {reference_p50 / p50:>7.2f}x")
+
+    if not passed:
+        logger.error(f"❌ 최소 코사인 유사도가 {args.min_cosine} 미만인 백엔드가 있습니다")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,12 @@ import os
 import sys
 import yaml
 import json
+import argparse
 import logging
 from pathlib import Path
 
+import numpy as np
+
 # 백엔드 경로 추가
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -50,9 +53,63 @@ SAMPLE_DATA = {
     ]
 }
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="카테고리별 벡터 데이터 생성")
+    parser.add_argument(
+        "--format", choices=["binary", "json", "both"], default="json",
+        help="json: 기존 JSON 형식 (기본값), binary: {category}_vectors.npy + _documents.json "
+             "(FAISS 없이 NumPy 검색을 쓸 때만 memmap 공유 이점이 있음)"
+    )
+    parser.add_argument(
+        "--dtype", choices=["float32", "float16"], default="float32",
+        help="바이너리 벡터 저장 타입 (float16은 용량 절반, 로딩 시 float32로 변환)"
+    )
+    return parser.parse_args()
+
+def save_binary(vector_data_dir: Path, category: str, documents, embeddings, dtype: str):
+    """바이너리 형식 저장: 행렬(.npy) + 행 순서대로 정렬된 문서 사이드카(.json)
+
+    .npy는 np.load(mmap_mode="r")로 열 수 있어 여러 워커가 페이지 캐시를 공유한다.
+    단, 이 공유는 NumPy 검색(FAISS 미설치)일 때만 유지된다. 기본 FAISS 백엔드는
+    add_embeddings에서 벡터를 인덱스 메모리로 복사하므로 로딩 시 JSON 파싱만 줄어든다.
+    """
+    matrix = np.ascontiguousarray(embeddings, dtype=dtype)
+    vectors_file = vector_data_dir / f"{category}_vectors.npy"
+    np.save(vectors_file, matrix)
+    
+    documents_file = vector_data_dir / f"{category}_documents.json"
+    sidecar = [
+        {"id": f"{category}_{i+1:03d}", "text": doc["text"], "category": doc["category"], "tags": doc["tags"]}
+        for i, doc in enumerate(documents)
+    ]
+    with open(documents_file, 'w', encoding='utf-8') as f:
+        json.dump(sidecar, f, ensure_ascii=False)
+    
+    logger.info(f"💾 {category} 바이너리 저장: {vectors_file} ({matrix.shape}, {dtype}, {matrix.nbytes} bytes)")
+
+def save_json(vector_data_dir: Path, category: str, documents, embeddings):
+    """기존 JSON 형식 저장 (임베딩을 float 리스트로 포함)"""
+    category_data = []
+    for i, doc in enumerate(documents):
+        category_data.append({
+            "id": f"{category}_{i+1:03d}",
+            "text": doc["text"],
+            "category": doc["category"],
+            "tags": doc["tags"],
+            "embedding": embeddings[i].tolist(),
+            "embedding_dim": len(embeddings[i])
+        })
+    
+    output_file = vector_data_dir / f"{category}_vectors.json"
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(category_data, f, ensure_ascii=False, indent=2)
+    
+    logger.info(f"💾 {category} 데이터 저장: {output_file}")
+
 def main():
     """벡터 데이터 생성 메인 함수"""
-    logger.info("🚀 벡터 데이터 생성 시작")
+    args = parse_args()
+    logger.info(f"🚀 벡터 데이터 생성 시작 (형식: {args.format}, dtype: {args.dtype})")
     
     # 임베딩 서비스 초기화
     try:
@@ -76,30 +133,17 @@ def main():
         
         # 임베딩 생성
         try:
-            embeddings = embedding_service.encode(texts)
+            embeddings = embedding_service.encode_array(texts)
             logger.info(f"✅ {category}: {len(embeddings)}개 임베딩 생성 완료")
         except Exception as e:
             logger.error(f"❌ {category} 임베딩 생성 실패: {e}")
             continue
         
         # 데이터 저장
-        category_data = []
-        for i, doc in enumerate(documents):
-            category_data.append({
-                "id": f"{category}_{i+1:03d}",
-                "text": doc["text"],
-                "category": doc["category"],
-                "tags": doc["tags"],
-                "embedding": embeddings[i],
-                "embedding_dim": len(embeddings[i])
-            })
-        
-        # JSON 파일로 저장
-        output_file = vector_data_dir / f"{category}_vectors.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(category_data, f, ensure_ascii=False, indent=2)
-        
-        logger.info(f"💾 {category} 데이터 저장: {output_file}")
+        if args.format in ("binary", "both"):
+            save_binary(vector_data_dir, category, documents, embeddings, args.dtype)
+        if args.format in ("json", "both"):
+            save_json(vector_data_dir, category, documents, embeddings)
         
         # YAML 메타데이터 저장
         metadata = {
@@ -108,6 +152,8 @@ def main():
             "embedding_model": embedding_service.model_name,
             "embedding_dim": embedding_service.get_embedding_dim(),
             "using_real_model": embedding_service.is_using_real_model(),
+            "vector_format": args.format,
+            "vector_dtype": args.dtype if args.format != "json" else "float32",
             "tags": list(set(tag for doc in documents for tag in doc["tags"]))
         }
         
@@ -1,11 +1,23 @@
 import logging
-from typing import Dict, List
+import os
+from typing import Dict, List, Optional, Tuple
+
+from services.keyword_matcher import KeywordAutomaton
 
 logger = logging.getLogger(__name__)
 
+# 추가 키워드 파일 (YAML, 선택): 카테고리 → [키워드 | {term, weight, synonyms}]
+CATEGORY_KEYWORDS_PATH = os.getenv("CATEGORY_KEYWORDS_PATH", "")
+
 class CategoryRouter:
-    def __init__(self):
-        self.keywords = {
+    def __init__(
+        self,
+        keywords: Optional[Dict[str, List[str]]] = None,
+        weights: Optional[Dict[str, Dict[str, float]]] = None,
+        synonyms: Optional[Dict[str, List[str]]] = None,
+        keywords_path: str = CATEGORY_KEYWORDS_PATH
+    ):
+        self.keywords = keywords or {
             "health": [
                 "건강", "병원", "의사", "치료", "약", "증상", "아픔", "아프", "진료", "검진",
                 "혈압", "당뇨", "콜레스테롤", "운동", "다이어트", "영양", "비타민", "감기",
@@ -27,30 +39,87 @@ class CategoryRouter:
                 "교통사고", "의료사고", "노동", "해고", "퇴직금", "임금", "근로계약"
             ]
         }
+        # 키워드 가중치 (카테고리 → 키워드 → 가중치, 없으면 1.0)
+        self.weights = weights or {}
+        # 동의어 (키워드 → 같은 키워드로 셀 표현들)
+        self.synonyms = synonyms or {}
+        if keywords_path:
+            self._load_keyword_file(keywords_path)
+        
+        self._build_matcher()
         
         logger.info("🏷️ Category Router 초기화 완료")
         logger.info(f"📝 카테고리별 키워드 수: {[(cat, len(keywords)) for cat, keywords in self.keywords.items()]}")
     
-    async def classify_category(self, text: str) -> str:
-        """텍스트 카테고리 분류"""
-        text_lower = text.lower()
-        scores = {}
-        
-        # 각 카테고리별 점수 계산
+    def _load_keyword_file(self, path: str):
+        """YAML 키워드 파일을 기본 목록에 합침 (실패 시 기본 목록만 사용)"""
+        try:
+            import yaml
+            with open(path, "r", encoding="utf-8") as f:
+                extra = yaml.safe_load(f) or {}
+            for category, entries in extra.items():
+                keywords = self.keywords.setdefault(category, [])
+                for entry in entries:
+                    if isinstance(entry, str):
+                        entry = {"term": entry}
+                    term = entry["term"]
+                    if term not in keywords:
+                        keywords.append(term)
+                    if "weight" in entry:
+                        self.weights.setdefault(category, {})[term] = float(entry["weight"])
+                    if entry.get("synonyms"):
+                        self.synonyms.setdefault(term, []).extend(entry["synonyms"])
+            logger.info(f"📄 추가 키워드 파일 적용: {path}")
+        except Exception as e:
+            logger.warning(f"⚠️ 키워드 파일 로딩 실패 ({path}): {e}")
+    
+    def _build_matcher(self):
+        """모든 카테고리의 키워드/동의어를 오토마타 하나로 컴파일
+
+        매칭 값은 (카테고리, 키워드 번호, 가중치)이고, 같은 키워드(동의어 포함)는
+        텍스트에 여러 번 나와도 한 번만 센다 - 기존 `keyword in text` 방식과 같은 점수.
+        """
+        patterns: Dict[str, list] = {}
+        keyword_id = 0
         for category, keywords in self.keywords.items():
-            score = 0
+            category_weights = self.weights.get(category, {})
             for keyword in keywords:
-                if keyword in text_lower:
-                    score += 1
-            scores[category] = score
+                value = (category, keyword_id, category_weights.get(keyword, 1.0))
+                for term in [keyword, *self.synonyms.get(keyword, [])]:
+                    # 기존 방식처럼 키워드는 그대로 소문자 텍스트와 비교 (대문자 키워드는 매칭되지 않음;
+                    # 소문자로 바꾸면 "ISA"가 "visa" 안에서도 잡혀 분류 결과가 달라진다)
+                    patterns.setdefault(term, []).append(value)
+                keyword_id += 1
+        self._matcher = KeywordAutomaton(patterns)
+        logger.info(f"🔤 키워드 매처 컴파일 완료: 패턴 {len(patterns)}개 ({self._matcher.backend})")
+    
+    def score(self, text: str) -> Dict[str, float]:
+        """카테고리별 점수 (텍스트에 나온 서로 다른 키워드의 가중치 합, 한 번 훑어서 계산)"""
+        scores = {category: 0.0 for category in self.keywords}
+        seen = set()
+        for category, keyword_id, weight in self._matcher.find(text.lower()):
+            if keyword_id not in seen:
+                seen.add(keyword_id)
+                scores[category] += weight
+        return scores
+    
+    def classify_with_confidence(self, text: str) -> Tuple[str, float]:
+        """텍스트 카테고리 분류 + 신뢰도 (최고 점수 / 전체 매칭 점수, 매칭 없으면 0)"""
+        scores = self.score(text)
         
         # 가장 높은 점수의 카테고리 반환
         if scores:
             best_category = max(scores, key=scores.get)
             if scores[best_category] > 0:
-                logger.info(f"🎯 카테고리 분류: '{text[:30]}...' → {best_category} (점수: {scores[best_category]})")
-                return best_category
+                confidence = scores[best_category] / sum(scores.values())
+                logger.info(f"🎯 카테고리 분류: '{text[:30]}...' → {best_category} (점수: {scores[best_category]:g}, 신뢰도: {confidence:.2f})")
+                return best_category, confidence
         
         # 기본값
         logger.info(f"🎯 카테고리 분류: '{text[:30]}...' → health (기본값)")
-        return "health"
+        return "health", 0.0
+    
+    async def classify_category(self, text: str) -> str:
+        """텍스트 카테고리 분류"""
+        category, _ = self.classify_with_confidence(text)
+        return category
@@ -0,0 +1,121 @@
+import logging
+import os
+import re
+from typing import Any, Callable, Dict, List, Tuple
+
+from services.embedding import EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+# 검색 문서 패킹 설정
+RAG_RETRIEVAL_TOP_K = int(os.getenv("RAG_RETRIEVAL_TOP_K", "5"))  # 패킹 후보로 가져올 문서 수
+RAG_MAX_PASSAGES = int(os.getenv("RAG_MAX_PASSAGES", "3"))  # 프롬프트에 넣을 최대 문서 수
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "512"))  # 참고 정보 전체 토큰 상한
+RAG_MAX_PASSAGE_TOKENS = int(os.getenv("RAG_MAX_PASSAGE_TOKENS", "192"))  # 문서 하나의 토큰 상한
+RAG_MIN_PASSAGE_TOKENS = int(os.getenv("RAG_MIN_PASSAGE_TOKENS", "24"))  # 이보다 짧게 잘라야 하면 제외
+RAG_DEDUP_SIMILARITY = float(os.getenv("RAG_DEDUP_SIMILARITY", "0.85"))  # 글자 bigram 자카드 유사도 기준
+
+# 문장 경계 (마침표/물음표/느낌표 뒤 공백)
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?。])\s+")
+
+
+class PromptTooLongError(Exception):
+    """질문이 너무 길어 생성할 토큰 자리를 남길 수 없음"""
+    status_code = 413
+
+
+class ContextBudgeter:
+    """검색 문서를 토큰 예산 안에 넣는 프롬프트 조립 단계
+
+    점수 순으로 정렬한 뒤 중복(정규화 텍스트 일치/포함, 유사도 높은 문서)을 걸러내고,
+    문서마다 RAG_MAX_PASSAGE_TOKENS, 전체는 min(RAG_CONTEXT_TOKEN_BUDGET, 프롬프트 잔여 토큰)에
+    맞춰 문장 단위로 자른다. 토큰 수는 LLM 토크나이저로 센다.
+    """
+
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int],
+        context_budget: int = RAG_CONTEXT_TOKEN_BUDGET,
+        max_passages: int = RAG_MAX_PASSAGES,
+        max_passage_tokens: int = RAG_MAX_PASSAGE_TOKENS,
+        min_passage_tokens: int = RAG_MIN_PASSAGE_TOKENS,
+        dedup_similarity: float = RAG_DEDUP_SIMILARITY
+    ):
+        self.count_tokens = count_tokens
+        self.context_budget = context_budget
+        self.max_passages = max_passages
+        self.max_passage_tokens = max_passage_tokens
+        self.min_passage_tokens = min_passage_tokens
+        self.dedup_similarity = dedup_similarity
+        self.stats = {"packed": 0, "trimmed": 0, "duplicates": 0, "over_budget": 0, "rejected": 0}
+
+    def pack(self, docs: List[Dict[str, Any]], available_tokens: int) -> Tuple[List[Dict[str, Any]], int]:
+        """문서를 예산에 맞춰 고르고 자름. (패킹된 문서, 사용한 토큰 수) 반환
+
+        available_tokens: 프롬프트 고정 부분과 생성 토큰을 빼고 남은 자리
+        """
+        budget = min(self.context_budget, available_tokens)
+        packed, used, seen = [], 0, []
+        for doc in sorted(docs, key=lambda d: d.get("score", 0.0), reverse=True):
+            if len(packed) >= self.max_passages:
+                break
+            normalized = EmbeddingCache.normalize(doc["text"])
+            if self._is_duplicate(normalized, seen):
+                self.stats["duplicates"] += 1
+                continue
+
+            # 번호 매김/줄바꿈 등 문서 한 줄의 부가 토큰 포함
+            line_tokens = self.count_tokens(f"{len(packed) + 1}. {doc['text']}\n")
+            limit = min(self.max_passage_tokens, budget - used)
+            text = doc["text"]
+            if line_tokens > limit:
+                text, line_tokens = self._trim(doc["text"], limit, len(packed) + 1)
+                if not text:
+                    self.stats["over_budget"] += 1
+                    continue
+                self.stats["trimmed"] += 1
+
+            seen.append(normalized)
+            packed.append({**doc, "text": text, "tokens": line_tokens})
+            used += line_tokens
+        self.stats["packed"] += len(packed)
+        return packed, used
+
+    def _trim(self, text: str, limit: int, number: int) -> Tuple[str, int]:
+        """앞에서부터 들어가는 문장까지만 남김 (첫 문장도 안 들어가거나 너무 짧으면 빈 문자열)"""
+        if limit < self.min_passage_tokens:
+            return "", 0
+        kept, kept_tokens = "", 0
+        for sentence in _SENTENCE_SPLIT.split(text):
+            candidate = f"{kept} {sentence}" if kept else sentence
+            tokens = self.count_tokens(f"{number}. {candidate}\n")
+            if tokens > limit:
+                break
+            kept, kept_tokens = candidate, tokens
+        if kept_tokens < self.min_passage_tokens:
+            return "", 0
+        return kept, kept_tokens
+
+    def _is_duplicate(self, normalized: str, seen: List[str]) -> bool:
+        grams = self._bigrams(normalized)
+        for other in seen:
+            if normalized in other or other in normalized:
+                return True
+            other_grams = self._bigrams(other)
+            union = len(grams | other_grams)
+            if union and len(grams & other_grams) / union >= self.dedup_similarity:
+                return True
+        return False
+
+    @staticmethod
+    def _bigrams(text: str) -> set:
+        text = text.replace(" ", "")
+        return {text[i:i + 2] for i in range(len(text) - 1)}
+
+    def get_stats(self) -> dict:
+        return {
+            "context_budget": self.context_budget,
+            "max_passages": self.max_passages,
+            "max_passage_tokens": self.max_passage_tokens,
+            **self.stats
+        }
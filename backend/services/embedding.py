@@ -1,16 +1,251 @@
 import logging
-from typing import List
+from typing import List, Optional
 import os
+import re
+import time
+import asyncio
 import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# 쿼리 임베딩 LRU 캐시 설정
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))  # 최대 항목 수 (0이면 비활성화)
+EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "64"))  # 최대 메모리 (MB)
+EMBEDDING_CACHE_MAX_BATCH = int(os.getenv("EMBEDDING_CACHE_MAX_BATCH", "8"))  # 이보다 큰 배치(코퍼스 적재)는 캐시 안 함
+
+# 동시 쿼리 마이크로배칭 설정
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "3"))  # 첫 요청 후 대기 시간
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "32"))  # 한 번에 인코딩할 최대 쿼리 수
+
+# 추론 백엔드: torch(기본) | torch-int8(동적 int8 양자화) | onnx(onnxruntime, scripts/check_embedding_backend.py --export로 생성)
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_PATH = os.getenv(
+    "EMBEDDING_ONNX_PATH", str(Path(__file__).parent.parent / "models" / "embedding_onnx" / "model.int8.onnx")
+)
+EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))  # 0이면 onnxruntime 기본값
+
+# 빠른 시작 모드: 의존성 설치/NLTK 다운로드/모델 순차 시도 없이 로컬 캐시의 모델 하나만 오프라인 로딩
+# 캐시 준비 예) SentenceTransformer("jhgan/ko-sroberta-multitask").save("models/embedding/jhgan_ko-sroberta-multitask")
+EMBEDDING_FAST_STARTUP = os.getenv("EMBEDDING_FAST_STARTUP", "false").lower() == "true"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "jhgan/ko-sroberta-multitask")
+EMBEDDING_MODEL_CACHE_DIR = os.getenv(
+    "EMBEDDING_MODEL_CACHE_DIR", str(Path(__file__).parent.parent / "models" / "embedding")
+)
+
+
+class EmbeddingCache:
+    """정규화된 텍스트 + 모델명 기준 LRU 임베딩 캐시 (항목 수/메모리 상한)"""
+
+    def __init__(self, max_entries: int = EMBEDDING_CACHE_SIZE, max_bytes: int = int(EMBEDDING_CACHE_MAX_MB * 1024 * 1024)):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[tuple, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """유니코드 정규화(NFKC) + 공백 정리 - 띄어쓰기만 다른 질문을 같은 키로"""
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+    @staticmethod
+    def _entry_size(key: tuple, vector) -> int:
+        return vector.nbytes + len(key[-1].encode("utf-8")) + 64  # 키/관리 오버헤드 근사
+
+    def get(self, key: tuple):
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key: tuple, vector):
+        size = self._entry_size(key, vector)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= self._entry_size(key, old)
+            self._entries[key] = vector
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                old_key, old_vector = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(old_key, old_vector)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+class EmbeddingMicroBatcher:
+    """동시에 들어온 쿼리 임베딩 요청을 묶어 model.encode 한 번으로 처리
+
+    첫 요청이 들어오면 window_ms 동안(또는 max_batch개가 찰 때까지) 모은 뒤
+    전용 스레드에서 인코딩하고, 각 호출자에게 자기 행을 돌려준다.
+    인코딩 중에 도착한 요청은 다음 배치로 자연스럽게 모인다.
+    """
+
+    def __init__(self, embedding_service, window_ms: float = EMBEDDING_BATCH_WINDOW_MS, max_batch: int = EMBEDDING_MAX_BATCH):
+        self.embedding_service = embedding_service
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-batcher")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: list = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def encode(self, text: str):
+        """쿼리 하나를 인코딩 (다른 동시 요청과 같은 배치로 묶일 수 있음)"""
+        loop = asyncio.get_event_loop()
+        if self._loop is not loop:  # 이벤트 루프가 바뀌면 상태 초기화
+            self._loop, self._pending, self._timer = loop, [], None
+        
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: list):
+        # 같은 배치 안의 중복 텍스트는 한 번만 인코딩
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        self.batches += 1
+        self.requests += len(batch)
+        self.largest_batch = max(self.largest_batch, len(unique_texts))
+        try:
+            embeddings = await self._loop.run_in_executor(
+                self._executor, lambda: self.embedding_service.encode_array(unique_texts, use_cache=True)
+            )
+            rows = dict(zip(unique_texts, embeddings))
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(rows[text])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def get_stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch
+        }
+
+
+class OnnxSentenceEncoder:
+    """onnxruntime으로 실행하는 문장 임베딩 모델 (SentenceTransformer.encode와 같은 인터페이스)
+
+    모델 디렉토리에는 .onnx 파일, 토크나이저 파일, onnx_config.json(원본 모델명,
+    max_seq_length)이 있어야 한다. 토큰 임베딩을 attention mask로 평균 풀링한다.
+    """
+
+    def __init__(self, model_path: str, num_threads: int = EMBEDDING_ONNX_THREADS):
+        import json
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = Path(model_path).parent
+        config_file = model_dir / "onnx_config.json"
+        config = json.loads(config_file.read_text(encoding="utf-8")) if config_file.exists() else {}
+        self.model_name = config.get("model_name", model_dir.name)
+        self.max_seq_length = config.get("max_seq_length", 128)
+        self.quantized = config.get("quantized", "int8" in Path(model_path).name)
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def encode(self, texts: List[str], batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, **kwargs):
+        import numpy as np
+
+        # 길이순으로 묶어 패딩 낭비를 줄이고, 결과는 원래 순서로 되돌린다
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        pooled = [None] * len(texts)
+        for start in range(0, len(order), batch_size):
+            batch_ids = order[start:start + batch_size]
+            tokens = self.tokenizer(
+                [texts[i] for i in batch_ids], padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np"
+            )
+            feeds = {name: tokens[name].astype(np.int64) for name in self.input_names if name in tokens}
+            token_embeddings = self.session.run(None, feeds)[0]
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            batch_pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            for i, row in zip(batch_ids, batch_pooled):
+                pooled[i] = row
+
+        embeddings = np.asarray(pooled, dtype=np.float32)
+        if normalize_embeddings and len(embeddings):
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings
+
+
 class EmbeddingService:
-    def __init__(self, model_name: str = "jhgan/ko-sroberta-multitask"):
+    def __init__(self, model_name: str = EMBEDDING_MODEL):
         self.model_name = model_name
         self.model = None
         self.embedding_dim = 768  # ko-sroberta-multitask의 출력 차원
         self.use_mock = False  # 실제 모델을 기본으로 변경
+        self.backend = EMBEDDING_BACKEND if EMBEDDING_BACKEND in EMBEDDING_BACKENDS else "torch"
+        self.startup_timings = {}  # 시작 단계별 소요 시간 (ms)
+        startup_start = time.perf_counter()
+        self.cache = EmbeddingCache()
+        self.batcher = EmbeddingMicroBatcher(self)
         
         # 환경변수로 Mock 모드 강제 가능 (디버깅용)
         force_mock = os.getenv("USE_MOCK_EMBEDDING", "false").lower() == "true"
@@ -28,17 +263,54 @@ class EmbeddingService:
                 logger.error(f"❌ 실제 임베딩 실패, Mock 모드로 전환: {e}")
                 logger.error(f"   상세 오류: {type(e).__name__}: {str(e)}")
                 self.use_mock = True
+        
+        self.startup_timings["total"] = round((time.perf_counter() - startup_start) * 1000, 1)
+        logger.info(f"⏱️ 임베딩 서비스 시작 단계별 시간(ms): {self.startup_timings}")
+    
+    @contextmanager
+    def _phase(self, name: str):
+        """시작 단계 소요 시간 기록 (같은 단계가 반복되면 누적)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.startup_timings[name] = round(self.startup_timings.get(name, 0.0) + elapsed, 1)
     
     def _load_real_model(self):
         """실제 임베딩 모델 로딩 - 여러 모델 시도"""
-        import numpy as np
-        import torch
+        if EMBEDDING_BACKEND not in EMBEDDING_BACKENDS:
+            logger.warning(f"⚠️ 알 수 없는 EMBEDDING_BACKEND '{EMBEDDING_BACKEND}', torch 사용")
+        
+        if EMBEDDING_FAST_STARTUP:
+            # 네트워크 없는 환경에서 허브 조회로 멈추지 않도록 오프라인 강제
+            os.environ.setdefault("HF_HUB_OFFLINE", "1")
+            os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+        
+        # ONNX 백엔드는 torch 없이 로딩 (실패 시 torch 경로로 대체)
+        if self.backend == "onnx":
+            try:
+                self._load_onnx_model()
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ ONNX 임베딩 모델 로딩 실패, torch로 대체: {e}")
+                self.backend = "torch"
+        
+        if EMBEDDING_FAST_STARTUP:
+            self._load_cached_model()
+            return
+        
+        with self._phase("import"):
+            import numpy as np
+            import torch
         
         # 의존성 문제 해결 시도
-        self._fix_dependencies()
+        with self._phase("fix_dependencies"):
+            self._fix_dependencies()
         
         # NLTK 설치 및 데이터 다운로드 시도
-        self._setup_nltk()
+        with self._phase("nltk"):
+            self._setup_nltk()
         
         # 사용할 모델 리스트 (한국어 특화 모델을 최우선으로)
         models_to_try = [
@@ -56,10 +328,13 @@ class EmbeddingService:
                 from sentence_transformers import SentenceTransformer
                 
                 # 모델 로딩 시 추가 설정
-                self.model = SentenceTransformer(model_name, device='cpu')
+                with self._phase("model_load"):
+                    self.model = SentenceTransformer(model_name, device='cpu')
+                    self._quantize_if_requested()
                 
                 # 테스트 (normalize_embeddings=True로 코사인 유사도 최적화)
-                test_embeddings = self.model.encode(["테스트"], convert_to_numpy=True, normalize_embeddings=True)
+                with self._phase("warmup"):
+                    test_embeddings = self.model.encode(["테스트"], convert_to_numpy=True, normalize_embeddings=True)
                 self.embedding_dim = test_embeddings.shape[1]
                 self.model_name = model_name  # 실제 로딩된 모델명으로 업데이트
                 logger.info(f"✅ 모델 로딩 성공: {model_name} (차원: {self.embedding_dim})")
@@ -72,6 +347,59 @@ class EmbeddingService:
         
         raise RuntimeError("모든 임베딩 모델 로딩 실패")
     
+    def _quantize_if_requested(self):
+        if self.backend != "torch-int8":
+            return
+        import torch
+        
+        # Linear 층 가중치를 int8로 동적 양자화 (CPU 추론 속도/메모리 개선)
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        logger.info("⚡ 임베딩 모델 int8 동적 양자화 적용")
+    
+    def _resolve_cached_model_path(self, model_name: str) -> Path:
+        """모델명(또는 경로)을 로컬 캐시 디렉토리로 변환 (없으면 다운로드하지 않고 실패)"""
+        cache_dir = Path(EMBEDDING_MODEL_CACHE_DIR)
+        candidates = [
+            Path(model_name),
+            cache_dir / model_name.replace("/", "_"),  # sentence-transformers 캐시 형식
+            cache_dir / model_name,
+        ]
+        for candidate in candidates:
+            if (candidate / "modules.json").exists() or (candidate / "config.json").exists():
+                return candidate
+        raise FileNotFoundError(f"로컬 캐시에 임베딩 모델 없음: {model_name} (검색 위치: {cache_dir})")
+    
+    def _load_cached_model(self):
+        """빠른 시작 모드: 설치/다운로드 단계 없이 설정된 모델 하나만 로컬 캐시에서 로딩"""
+        model_path = self._resolve_cached_model_path(self.model_name)
+        logger.info(f"⚡ 빠른 시작 모드: {self.model_name} ({model_path})")
+        
+        with self._phase("import"):
+            from sentence_transformers import SentenceTransformer
+        
+        with self._phase("model_load"):
+            self.model = SentenceTransformer(str(model_path), device='cpu')
+            self._quantize_if_requested()
+        
+        with self._phase("warmup"):
+            test_embeddings = self.model.encode(["테스트"], convert_to_numpy=True, normalize_embeddings=True)
+        self.embedding_dim = test_embeddings.shape[1]
+        logger.info(f"✅ 모델 로딩 성공: {self.model_name} (차원: {self.embedding_dim})")
+    
+    def _load_onnx_model(self):
+        """EMBEDDING_ONNX_PATH의 ONNX 모델 로딩"""
+        if not Path(EMBEDDING_ONNX_PATH).exists():
+            raise FileNotFoundError(f"ONNX 모델 파일 없음: {EMBEDDING_ONNX_PATH}")
+        
+        logger.info(f"🔄 ONNX 임베딩 모델 로딩: {EMBEDDING_ONNX_PATH}")
+        with self._phase("model_load"):
+            self.model = OnnxSentenceEncoder(EMBEDDING_ONNX_PATH)
+        with self._phase("warmup"):
+            test_embeddings = self.model.encode(["테스트"], normalize_embeddings=True)
+        self.embedding_dim = test_embeddings.shape[1]
+        self.model_name = self.model.model_name  # 사전 계산 벡터 호환성 확인은 원본 모델명 기준
+        logger.info(f"✅ ONNX 모델 로딩 성공: {self.model_name} (차원: {self.embedding_dim}, int8: {self.model.quantized})")
+    
     def _fix_dependencies(self):
         """의존성 문제 자동 해결"""
         try:
@@ -208,68 +536,110 @@ class EmbeddingService:
                 logger.warning(f"⚠️ NLTK 자동 설치 실패: {e}")
                 logger.warning("   일부 모델에서 문제가 발생할 수 있습니다")
     
-    def encode(self, texts: List[str]):
-        """텍스트를 벡터로 변환"""
+    def encode(self, texts: List[str], use_cache: Optional[bool] = None) -> List[List[float]]:
+        """텍스트를 벡터로 변환 (float 리스트, JSON 응답/저장용)
+
+        내부 검색·적재 경로는 변환 비용이 없는 encode_array를 사용한다.
+        """
+        return self.encode_array(texts, use_cache).tolist()
+    
+    def encode_array(self, texts: List[str], use_cache: Optional[bool] = None):
+        """텍스트를 (len(texts), dim) 연속 float32 행렬로 변환
+
+        작은 배치(쿼리)는 LRU 캐시를 먼저 확인하고, 캐시에 없는 텍스트만 모델에 넣는다.
+        use_cache=None이면 EMBEDDING_CACHE_MAX_BATCH 이하 배치에만 캐시를 사용한다.
+        """
+        if use_cache is None:
+            use_cache = len(texts) <= EMBEDDING_CACHE_MAX_BATCH
+        if not use_cache or not self.cache.enabled:
+            return self._encode_uncached(texts)
+        
+        import numpy as np
+        
+        cached = [self.cache.get(self._cache_key(text)) for text in texts]
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if len(missing) == len(texts):
+            computed = self._encode_uncached(texts)
+            for text, vector in zip(texts, computed):
+                self.cache.put(self._cache_key(text), vector.copy())  # 배치 행렬 전체가 캐시에 묶이지 않도록 복사
+            return computed
+        
+        result = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        for i, vector in enumerate(cached):
+            if vector is not None:
+                result[i] = vector
+        
+        if missing:
+            computed = self._encode_uncached([texts[i] for i in missing])
+            result[missing] = computed
+            for i, vector in zip(missing, computed):
+                self.cache.put(self._cache_key(texts[i]), vector.copy())
+        
+        return result
+    
+    async def encode_query(self, text: str):
+        """요청 처리 경로용 비동기 쿼리 인코딩 (마이크로배칭 + 캐시, 이벤트 루프 비차단)"""
+        return await self.batcher.encode(text)
+    
+    def _cache_key(self, text: str) -> tuple:
+        # Mock 전환 시 실제 모델 벡터와 섞이지 않도록 모드도 키에 포함
+        return (self.model_name, self.use_mock, EmbeddingCache.normalize(text))
+    
+    def _encode_uncached(self, texts: List[str]):
+        """캐시 없이 모델(또는 Mock)로 인코딩해 연속 float32 행렬 반환"""
+        import numpy as np
+        
+        if not texts:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+        
         if self.use_mock:
-            return self._mock_encode(texts)
+            return np.array(self._mock_encode(texts), dtype=np.float32)
         
         if not self.model:
             logger.warning("⚠️ 실제 모델이 없어 Mock 모드로 전환")
             self.use_mock = True
-            return self._mock_encode(texts)
+            return np.array(self._mock_encode(texts), dtype=np.float32)
         
         try:
             logger.info(f"🔄 실제 임베딩 인코딩: {len(texts)}개 텍스트")
             # normalize_embeddings=True로 코사인 유사도 최적화
             embeddings = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
             logger.info(f"✅ 실제 임베딩 완료: {embeddings.shape}")
-            return embeddings.tolist()
+            # 모델 출력이 이미 float32 연속 배열이면 복사 없이 그대로 반환
+            return np.ascontiguousarray(embeddings, dtype=np.float32)
             
         except Exception as e:
             logger.error(f"❌ 실제 임베딩 실패, Mock으로 대체: {e}")
             self.use_mock = True
-            return self._mock_encode(texts)
+            return np.array(self._mock_encode(texts), dtype=np.float32)
     
-    def _mock_encode(self, texts: List[str]) -> List[List[float]]:
-        """Mock 임베딩 생성 (호환성 보장)"""
+    def _mock_encode(self, texts: List[str]):
+        """Mock 임베딩 생성 (호환성 보장)
+
+        SHA-256 해시 기반 벡터를 배치 전체에 대해 NumPy로 한 번에 계산한다.
+        기존 텍스트별 Python 구현과 비트 단위로 같은 (len(texts), dim) float64 행렬을 반환한다.
+        """
+        import numpy as np
+        
         logger.info(f"🤖 Mock 임베딩 생성: {len(texts)}개 텍스트")
         
-        embeddings = []
-        for text in texts:
-            embedding = self._text_to_vector(text)
-            embeddings.append(embedding)
+        # 해시 32바이트 → big-endian uint32 8개 → -1 ~ 1 정규화
+        digests = b"".join(hashlib.sha256(text.encode('utf-8')).digest() for text in texts)
+        base = np.frombuffer(digests, dtype='>u4').reshape(len(texts), 8).astype(np.float64)
+        base = (base / (2**32 - 1)) * 2 - 1
         
-        return embeddings
+        # 해시 값을 반복해 768차원으로 맞춤 (vector[i] = base[i % 8])
+        vectors = base[:, np.arange(self.embedding_dim) % 8]
+        
+        # L2 정규화: Python sum과 같은 순서로 더하도록 누적합(순차 덧셈)의 마지막 값을 쓰고,
+        # 제곱근은 libm pow 결과와 맞추기 위해 Python ** 0.5로 계산 (np.sqrt와 1ulp 차이 날 수 있음)
+        squared_sums = np.cumsum(vectors * vectors, axis=1)[:, -1]
+        norms = np.array([total ** 0.5 for total in squared_sums.tolist()])[:, None]
+        return np.divide(vectors, norms, out=vectors, where=norms > 0)
     
     def _text_to_vector(self, text: str) -> List[float]:
         """텍스트를 일관된 벡터로 변환 (Hash 기반)"""
-        # SHA-256 해시를 사용하여 더 안정적인 벡터 생성
-        hash_obj = hashlib.sha256(text.encode('utf-8'))
-        hash_bytes = hash_obj.digest()
-        
-        # 해시를 float 값으로 변환
-        vector = []
-        for i in range(0, len(hash_bytes), 4):
-            chunk = hash_bytes[i:i+4]
-            if len(chunk) == 4:
-                int_val = int.from_bytes(chunk, byteorder='big')
-                float_val = (int_val / (2**32 - 1)) * 2 - 1  # -1 ~ 1 정규화
-                vector.append(float_val)
-        
-        # 벡터 길이를 768로 맞춤 (ko-sroberta-multitask에 맞춰)
-        while len(vector) < self.embedding_dim:
-            # 기존 벡터를 반복하여 길이 맞춤
-            remaining = self.embedding_dim - len(vector)
-            vector.extend(vector[:min(len(vector), remaining)])
-        
-        vector = vector[:self.embedding_dim]
-        
-        # L2 정규화
-        norm = sum(x*x for x in vector) ** 0.5
-        if norm > 0:
-            vector = [x / norm for x in vector]
-        
-        return vector
+        return self._mock_encode([text])[0].tolist()
     
     def get_embedding_dim(self) -> int:
         """임베딩 차원 수 반환"""
@@ -279,13 +649,22 @@ class EmbeddingService:
         """실제 모델 사용 여부 반환"""
         return not self.use_mock
     
+    def get_backend(self) -> str:
+        """현재 임베딩을 만드는 백엔드 (torch/torch-int8/onnx, Mock 모드는 "mock")"""
+        return self.backend if not self.use_mock else "mock"
+    
     def get_status(self) -> dict:
         """임베딩 서비스 상태 반환"""
         return {
             "model_name": self.model_name,
             "embedding_dim": self.embedding_dim,
             "using_real_model": not self.use_mock,
+            "backend": self.get_backend(),
+            "fast_startup": EMBEDDING_FAST_STARTUP,
+            "startup_timings_ms": self.startup_timings,
             "status": "real" if not self.use_mock else "mock",
-            "compatibility_note": "실제 모델" if not self.use_mock else "Mock 모드 (의존성 문제)"
+            "compatibility_note": "실제 모델" if not self.use_mock else "Mock 모드 (의존성 문제)",
+            "cache": self.cache.get_stats(),
+            "batching": self.batcher.get_stats()
         }
 
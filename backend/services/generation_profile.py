@@ -0,0 +1,218 @@
+import logging
+import os
+import re
+from collections import deque
+from typing import Callable, Dict, Generator, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 카테고리별 생성 길이 프로필 (토큰)
+#   max_tokens: 생성 상한, min_tokens: 길이 조절기가 낮출 수 있는 하한
+#   action_max_chars: [실천 조언] 섹션이 이 길이를 넘으면 다음 문장 끝에서 종료
+GENERATION_PROFILES: Dict[str, Dict[str, int]] = {
+    "health": {"max_tokens": 768, "min_tokens": 320, "action_max_chars": 450},
+    "travel": {"max_tokens": 768, "min_tokens": 320, "action_max_chars": 450},
+    "investment": {"max_tokens": 704, "min_tokens": 288, "action_max_chars": 400},
+    "legal": {"max_tokens": 704, "min_tokens": 288, "action_max_chars": 400},
+}
+DEFAULT_PROFILE = "health"
+
+# 길이 조절기: 최근 답변 길이 분포의 백분위수 × 여유 배율을 max_tokens로 사용
+RAG_LENGTH_GOVERNOR = os.getenv("RAG_LENGTH_GOVERNOR", "true").lower() == "true"
+RAG_LENGTH_WINDOW = int(os.getenv("RAG_LENGTH_WINDOW", "200"))  # 카테고리별 보관 표본 수
+RAG_LENGTH_MIN_SAMPLES = int(os.getenv("RAG_LENGTH_MIN_SAMPLES", "20"))  # 이만큼 쌓이기 전엔 프로필 상한 사용
+RAG_LENGTH_PERCENTILE = float(os.getenv("RAG_LENGTH_PERCENTILE", "95"))
+RAG_LENGTH_HEADROOM = float(os.getenv("RAG_LENGTH_HEADROOM", "1.25"))
+
+# 답변 형식 (프롬프트에서 요구하는 3개 섹션, 이 순서대로)
+ANSWER_SECTIONS = ("[요약]", "[상세 설명]", "[실천 조언]")
+# 마지막 섹션이 이 길이(글자)를 넘기 전에는 형식 기반 종료를 하지 않음
+SECTION_MIN_CHARS = int(os.getenv("RAG_SECTION_MIN_CHARS", "40"))
+
+# 새 머리말 (숫자로 시작하는 [1] 같은 인용 표시는 제외, 괄호 안 최대 _HEADER_MAX_CHARS자)
+_HEADER_MAX_CHARS = 12
+_BRACKET_HEADER = re.compile(r"\[[^\[\]\n\d][^\[\]\n]{0,%d}\]" % (_HEADER_MAX_CHARS - 1))
+# 모델이 프롬프트 형식을 흉내 내며 다음 질문을 만들어 내는 경우
+_ECHO_WORDS = ("사용자 질문", "질문", "답변")
+_ECHO = re.compile(r"\n\s*(?:" + "|".join(_ECHO_WORDS) + r")\s*:")
+# 실천 조언 뒤 빈 줄 다음에 목록이 아닌 문단(맺음말 등)이 오면 답변 끝으로 봄
+_TRAILING_PARAGRAPH = re.compile(r"\n\s*\n(?=\s*[^\s\-*•·\d])")
+_SENTENCE_END = re.compile(r"[.!?。](?=\s|$)")
+
+
+def profile_category(category: Optional[str]) -> str:
+    """요청의 카테고리를 알려진 프로필 키로 (그 외 값은 기본 프로필)
+
+    카테고리는 클라이언트가 임의로 보낼 수 있으므로 지표 라벨이나 표본 키로 쓰기 전에 거친다.
+    """
+    return category if category in GENERATION_PROFILES else DEFAULT_PROFILE
+
+
+def get_profile(category: Optional[str]) -> Dict[str, int]:
+    return GENERATION_PROFILES[profile_category(category)]
+
+
+class AnswerFormatMonitor:
+    """생성 중인 텍스트를 보고 [요약]/[상세 설명]/[실천 조언]이 끝났으면 종료 위치를 알려줌
+
+    LLM 매니저의 stop_condition으로 토큰(조각)마다 누적 텍스트를 받아 호출된다.
+    세 섹션이 순서대로 나온 뒤 마지막 섹션에서 다음 중 하나가 보이면 그 위치에서 자른다:
+    새 [머리말] 섹션, 질문/답변 형식 반복, 목록 뒤 맺음말 문단, 섹션 길이 상한 도달.
+    """
+
+    def __init__(self, action_max_chars: int, min_chars: int = SECTION_MIN_CHARS):
+        self.action_max_chars = action_max_chars
+        self.min_chars = min_chars
+        self.next_section = 0
+        self.scan_from = 0
+        self.action_start: Optional[int] = None
+        self.reason: Optional[str] = None
+
+    def __call__(self, text: str) -> Optional[int]:
+        # 머리말이 조각 경계에 걸칠 수 있으므로 조금 앞에서부터 다시 검사
+        while self.next_section < len(ANSWER_SECTIONS):
+            header = ANSWER_SECTIONS[self.next_section]
+            position = text.find(header, self.scan_from)
+            if position == -1:
+                self.scan_from = max(0, len(text) - len(header))
+                return None
+            self.next_section += 1
+            self.scan_from = position + len(header)
+            self.action_start = self.scan_from
+
+        body_start = self.action_start
+        body_length = len(text) - body_start
+        if body_length < self.min_chars:
+            return None
+
+        # (종료 사유, 패턴, 검사 시작 위치) - 섹션 첫머리의 빈 줄은 맺음말로 보지 않음
+        checks = (
+            ("extra_section", _BRACKET_HEADER, body_start),
+            ("echo", _ECHO, body_start),
+            ("trailing_paragraph", _TRAILING_PARAGRAPH, body_start + self.min_chars),
+        )
+        for reason, pattern, start in checks:
+            match = pattern.search(text, start)
+            if match:
+                self.reason = reason
+                return match.start()
+
+        if body_length >= self.action_max_chars:
+            # 상한을 넘긴 뒤 마지막 문장 끝에서 종료 (문장 중간이면 다음 조각까지 기다림)
+            ends = list(_SENTENCE_END.finditer(text, body_start + self.min_chars))
+            if ends and text[ends[-1].end():].strip() == "":
+                self.reason = "section_length"
+                return ends[-1].end()
+        return None
+
+    def pending_from(self, text: str) -> int:
+        """아직 머리말/질문 반복으로 이어질 수 있어 내보내면 안 되는 꼬리의 시작 위치
+
+        닫히지 않은 "[..."와, 마지막 줄바꿈 뒤가 비어 있거나 "질문"/"답변" 등의 앞부분인 경우
+        (줄바꿈 앞 공백 포함)를 보류한다. 다음 조각에서 확정되면 그때 내보내거나 잘린다.
+        """
+        position = len(text)
+        bracket = text.rfind("[")
+        if bracket != -1:
+            inside = text[bracket + 1:]
+            if "]" not in inside and "\n" not in inside and len(inside) <= _HEADER_MAX_CHARS \
+                    and not inside[:1].isdigit():
+                position = bracket
+
+        newline = text.rfind("\n")
+        if newline != -1:
+            line = text[newline + 1:].strip()
+            if not line or any(word.startswith(line) for word in _ECHO_WORDS):
+                start = newline
+                while start > 0 and text[start - 1].isspace():
+                    start -= 1
+                position = min(position, start)
+        return position
+
+
+def iter_until_stop(
+    chunks: Iterable[str],
+    stop_condition: Optional[Callable[[str], Optional[int]]],
+    on_stop: Callable[[], None]
+) -> Generator[str, None, str]:
+    """생성 조각에 stop_condition을 적용해 내보내고, 최종 텍스트를 반환값으로 돌려줌
+
+    stop_condition이 pending_from()을 가지면 잘릴 수 있는 꼬리를 확정될 때까지 보류하므로
+    이미 내보낸 텍스트가 종료 위치 뒤에 남지 않는다. 종료 위치가 정해지면 on_stop()을 호출한다.
+    """
+    pending_from = getattr(stop_condition, "pending_from", None)
+    text, emitted = "", 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        text += chunk
+        cut = stop_condition(text) if stop_condition else None
+        if cut is not None:
+            text = text[:cut]
+            if len(text) > emitted:
+                yield text[emitted:]
+            on_stop()
+            return text
+        safe = pending_from(text) if pending_from else len(text)
+        if safe > emitted:
+            yield text[emitted:safe]
+            emitted = safe
+    if len(text) > emitted:
+        yield text[emitted:]
+    return text
+
+
+class LengthGovernor:
+    """카테고리별 최근 답변 길이(토큰) 분포로 max_tokens를 조절
+
+    표본이 쌓이면 max_tokens = 백분위수 × 여유 배율을 프로필 [min_tokens, max_tokens]로 제한한다.
+    상한에 걸려 잘린 답변도 상한 길이로 기록하므로, 잘림이 잦아지면 다시 상한 쪽으로 올라간다.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = RAG_LENGTH_GOVERNOR,
+        window: int = RAG_LENGTH_WINDOW,
+        min_samples: int = RAG_LENGTH_MIN_SAMPLES,
+        percentile: float = RAG_LENGTH_PERCENTILE,
+        headroom: float = RAG_LENGTH_HEADROOM,
+        cap: Optional[int] = None
+    ):
+        self.enabled = enabled
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.headroom = headroom
+        self.cap = cap  # 전역 상한 (RAG_MAX_NEW_TOKENS)
+        self._samples: Dict[str, deque] = {}
+
+    def _bounds(self, category: str):
+        profile = get_profile(category)
+        upper = min(profile["max_tokens"], self.cap) if self.cap else profile["max_tokens"]
+        return min(profile["min_tokens"], upper), upper
+
+    def max_tokens(self, category: str) -> int:
+        category = profile_category(category)
+        lower, upper = self._bounds(category)
+        samples = self._samples.get(category)
+        if not self.enabled or not samples or len(samples) < self.min_samples:
+            return upper
+        import numpy as np
+
+        target = int(np.percentile(samples, self.percentile) * self.headroom)
+        return max(lower, min(upper, target))
+
+    def record(self, category: str, tokens: int):
+        if tokens <= 0:
+            return
+        category = profile_category(category)
+        self._samples.setdefault(category, deque(maxlen=self.window)).append(tokens)
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "categories": {
+                category: {"samples": len(samples), "max_tokens": self.max_tokens(category)}
+                for category, samples in self._samples.items()
+            }
+        }
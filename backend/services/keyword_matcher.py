@@ -0,0 +1,76 @@
+import logging
+from collections import deque
+from typing import Any, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# pyahocorasick(C 구현)은 선택 의존성: 없으면 순수 파이썬 오토마타 사용
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    ahocorasick = None
+    AHOCORASICK_AVAILABLE = False
+
+
+class KeywordAutomaton:
+    """여러 키워드를 텍스트 한 번 훑어서 모두 찾는 Aho-Corasick 오토마타
+
+    patterns: 패턴 문자열 → 매칭 시 돌려줄 값 목록. 한 번 만들어 두고 재사용하며,
+    find()는 텍스트에 나타난 패턴마다 값을 내보낸다 (같은 패턴이 여러 번 나오면 여러 번).
+    """
+
+    def __init__(self, patterns: Dict[str, List[Any]]):
+        self.size = len(patterns)
+        self.backend = "pyahocorasick" if AHOCORASICK_AVAILABLE else "python"
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for pattern, values in patterns.items():
+                self._automaton.add_word(pattern, tuple(values))
+            if patterns:
+                self._automaton.make_automaton()
+        else:
+            self._build(patterns)
+
+    def _build(self, patterns: Dict[str, List[Any]]):
+        # 트라이: 노드마다 다음 글자 → 노드, 실패 링크, 이 노드에서 끝나는 패턴 값들
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[tuple] = [()]
+        for pattern, values in patterns.items():
+            node = 0
+            for char in pattern:
+                if char not in self._goto[node]:
+                    self._goto.append({})
+                    self._output.append(())
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._output[node] += tuple(values)
+
+        # BFS로 실패 링크를 잇고, 접미사로 끝나는 패턴 값을 미리 합쳐 둠
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())  # 깊이 1 노드의 실패 링크는 루트
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] += self._output[self._fail[child]]
+                queue.append(child)
+
+    def find(self, text: str) -> Iterator[Any]:
+        if self.backend == "pyahocorasick":
+            if self.size:
+                for _, values in self._automaton.iter(text):
+                    yield from values
+            return
+
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                yield from output[node]
@@ -1,18 +1,592 @@
 import os
+import glob
+import queue
+import codecs
 import asyncio
 import logging
-from llama_cpp import Llama
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Generator, Iterator, List, Optional
+from llama_cpp import Llama, StoppingCriteriaList
+from services.metrics import observe_inference_job
+from services.sampling import sample_token
+from services.generation_profile import iter_until_stop
 
 MODEL_PATH = "models/llama-3.2-korean-bllossom-3b-q4_k_m.gguf"
 MODEL_NAME = "llama-3.2-korean-bllossom-3b-q4_k_m"
 
+# 추론 스케줄러 설정 (환경변수로 조절)
+LLM_WORKERS = os.getenv("LLM_WORKERS", "1")  # 모델 인스턴스(=워커) 수, "auto"면 코어 수 / 워커당 스레드 수
+LLM_THREADS_PER_WORKER = int(os.getenv("LLM_THREADS_PER_WORKER", "4"))  # 인스턴스당 llama.cpp 스레드 수
+LLM_N_CTX = int(os.getenv("LLM_N_CTX", "2048"))  # 인스턴스당 컨텍스트 길이
+# 워커 스레드를 전용 코어(NUMA 노드 내)에 고정: auto는 인스턴스가 2개 이상일 때만
+# (인스턴스 하나를 고정하면 같은 호스트의 다른 프로세스와 같은 코어에 몰릴 수 있음)
+LLM_PIN_CPUS = os.getenv("LLM_PIN_CPUS", "auto").lower()
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "8"))  # 대기열 최대 길이
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))  # 대기열 최대 대기 시간(초)
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "120"))  # 요청당 전체 처리 시한(초)
+
+# 연속 배칭: 인스턴스 하나의 컨텍스트에서 여러 요청을 시퀀스 ID로 나눠 함께 디코딩 (opt-in)
+# 예약 토큰(프롬프트 + max_tokens) 합이 예산을 넘지 않게 합류시키므로 LLM_N_CTX를 늘려서 사용
+LLM_BATCHING = os.getenv("LLM_BATCHING", "false").lower() == "true"
+LLM_BATCH_MAX_SEQS = int(os.getenv("LLM_BATCH_MAX_SEQS", "4"))  # 인스턴스당 동시 시퀀스 수
+LLM_BATCH_TOKEN_BUDGET = int(os.getenv("LLM_BATCH_TOKEN_BUDGET", "0"))  # 0이면 n_ctx
+
+# 일반/스트리밍/배칭 생성에 공통으로 쓰는 샘플링 파라미터
+SAMPLING_PARAMS = {
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "top_k": 40,
+    "min_p": 0.05,  # llama-cpp-python 기본값 (배치 엔진 샘플러도 같은 값을 쓰도록 명시)
+    "repeat_penalty": 1.1,
+    "stop": ["Q:", "User:"]
+}
+
+# 카테고리 시스템 프롬프트(접두부)의 KV 상태를 저장해 두고 생성 전에 복원
+LLM_PREFIX_CACHE = os.getenv("LLM_PREFIX_CACHE", "true").lower() == "true"
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class InferenceRejectedError(Exception):
+    """스케줄러가 요청을 받아들이지 못함 (HTTP 상태 코드 포함)"""
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(InferenceRejectedError):
+    """대기열이 가득 참 → 429"""
+    status_code = 429
+
+
+class QueueTimeoutError(InferenceRejectedError):
+    """대기열에서 시한 내에 워커를 배정받지 못했거나, 처리 시한 안에 생성을 끝내지 못함 → 503"""
+    status_code = 503
+
+
+def _parse_cpulist(text: str) -> List[int]:
+    """'0-3,8,10-11' 형식의 cpulist를 CPU 번호 리스트로 변환"""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-")
+            cpus.extend(range(int(start), int(end) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def _numa_cpu_groups() -> List[List[int]]:
+    """이 프로세스가 쓸 수 있는 CPU를 NUMA 노드별로 묶음 (정보가 없으면 하나의 그룹)"""
+    if hasattr(os, "sched_getaffinity"):
+        available = set(os.sched_getaffinity(0))
+    else:
+        available = set(range(os.cpu_count() or 1))
+
+    groups = []
+    for node_dir in sorted(glob.glob("/sys/devices/system/node/node[0-9]*")):
+        try:
+            with open(os.path.join(node_dir, "cpulist")) as f:
+                cpus = [cpu for cpu in _parse_cpulist(f.read()) if cpu in available]
+        except (OSError, ValueError):
+            continue
+        if cpus:
+            groups.append(cpus)
+    return groups or [sorted(available)]
+
+
+def plan_worker_cpus(threads_per_worker: int = LLM_THREADS_PER_WORKER, workers: str = LLM_WORKERS) -> List[List[int]]:
+    """워커(모델 인스턴스)별 CPU 집합 계획
+
+    NUMA 노드마다 threads_per_worker개씩 잘라 워커가 노드 경계를 넘지 않게 한다
+    (cpulist는 보통 물리 코어가 먼저 나오므로 하이퍼스레드 형제는 뒤로 밀린다).
+    workers가 "auto"/0이면 잘라낸 조각 수만큼 워커를 만들고, 조각 수보다 많이 요청해도 조각 수까지만 만든다.
+    """
+    threads_per_worker = max(1, threads_per_worker)
+    groups = _numa_cpu_groups()
+    slices = []
+    for cpus in groups:
+        for start in range(0, len(cpus) - threads_per_worker + 1, threads_per_worker):
+            slices.append(cpus[start:start + threads_per_worker])
+    if not slices:  # 코어가 워커당 스레드 수보다 적은 경우
+        slices = [[cpu for cpus in groups for cpu in cpus]]
+
+    count = len(slices) if str(workers).lower() in ("auto", "0") else max(1, int(workers))
+    if count > len(slices):
+        # 같은 코어를 여러 인스턴스가 나눠 쓰면 서로 밀어내 오히려 느려지므로 조각 수로 제한
+        logger.warning(
+            f"⚠️ LLM_WORKERS={workers}가 코어 조각 수({len(slices)}, 워커당 스레드 {threads_per_worker})보다 많아 "
+            f"워커를 {len(slices)}개로 제한합니다"
+        )
+        count = len(slices)
+    return slices[:count]
+
+
+def _pin_current_thread(cpus: List[int]):
+    """ThreadPoolExecutor initializer: 워커 스레드를 지정 코어에 고정
+
+    llama.cpp가 연산마다 만드는 스레드는 생성한 스레드의 affinity를 물려받는다.
+    """
+    try:
+        os.sched_setaffinity(threading.get_native_id(), cpus)
+    except (AttributeError, OSError) as e:
+        logger.warning(f"⚠️ CPU 고정 실패 ({cpus}): {e}")
+
+
+class InferenceJob:
+    """스케줄러 대기열에 들어가는 추론 작업 하나"""
+
+    def __init__(self, fn: Callable, loop: asyncio.AbstractEventLoop, deadline: float):
+        self.fn = fn
+        self.future = loop.create_future()
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.generated_tokens = 0
+        self.deadline_at = self.enqueued_at + deadline
+        self._cancelled = threading.Event()
+        self._stop_requested = threading.Event()
+        self._timed_out = threading.Event()
+
+    def cancel(self):
+        """호출 측이 더 이상 결과를 기다리지 않음 (실행 중이면 다음 토큰에서 중단)"""
+        self._cancelled.set()
+        if not self.future.done():
+            self.future.cancel()
+
+    def request_stop(self):
+        """워커 스레드에서 호출: 결과는 유지한 채 생성만 끝냄 (답변 형식 완료 등)"""
+        self._stop_requested.set()
+
+    def record_token(self):
+        """워커 스레드에서 토큰마다 호출: 첫 토큰 시각과 생성 토큰 수 기록"""
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+        self.generated_tokens += 1
+
+    def should_stop(self) -> bool:
+        """워커 스레드에서 토큰마다 호출: 취소되었거나 시한을 넘겼는지"""
+        if self._cancelled.is_set() or self._stop_requested.is_set():
+            return True
+        if time.monotonic() > self.deadline_at:
+            self._timed_out.set()
+            return True
+        return False
+
+    def deadline_exceeded(self) -> bool:
+        """시한 초과로 생성이 중간에 끊겼는지 (시한 직후 정상 종료된 경우는 제외)"""
+        return self._timed_out.is_set()
+
+
+class InferenceScheduler:
+    """제한된 대기열 + 고정 개수의 모델 인스턴스로 구성된 추론 스케줄러
+
+    Llama 객체는 여러 스레드에서 동시에 호출하면 안전하지 않으므로
+    인스턴스마다 전용 스레드(필요하면 전용 코어에 고정)를 둔다. 디스패처가
+    대기열에서 작업을 꺼내 가장 한가한 인스턴스에 배정한다. 대기열이 가득 차면
+    즉시 QueueFullError(429)를, 대기 시간이 길어지면 QueueTimeoutError(503)를 낸다.
+    """
+
+    def __init__(
+        self,
+        models: List,
+        max_queue: int = LLM_MAX_QUEUE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT,
+        deadline: float = LLM_DEADLINE,
+        cpu_sets: Optional[List[List[int]]] = None,
+        slots_per_instance: int = 1
+    ):
+        self.models = list(models)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.deadline = deadline
+        self.cpu_sets = cpu_sets or [None] * len(self.models)
+        self.slots_per_instance = slots_per_instance
+        self.active = 0
+        self.stats = {"accepted": 0, "rejected": 0, "timed_out": 0, "completed": 0, "failed": 0}
+        self.instance_active = [0] * len(self.models)
+        self.instance_stats = [
+            {"completed": 0, "failed": 0, "busy_seconds": 0.0, "generated_tokens": 0}
+            for _ in self.models
+        ]
+        self._executors = [
+            ThreadPoolExecutor(
+                max_workers=slots_per_instance,
+                thread_name_prefix=f"llm-worker-{i}",
+                initializer=_pin_current_thread if cpus else None,
+                initargs=(cpus,) if cpus else ()
+            )
+            for i, cpus in enumerate(self.cpu_sets)
+        ]
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slot_freed: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    def _ensure_started(self):
+        """현재 이벤트 루프에서 디스패처 기동 (루프가 바뀌면 다시 기동)"""
+        loop = asyncio.get_event_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slot_freed = asyncio.Event()
+        self._dispatcher = loop.create_task(self._dispatch())
+        logger.info(f"🧵 추론 스케줄러 기동: 인스턴스 {len(self.models)}개, 대기열 {self.max_queue}")
+
+    def has_capacity(self) -> bool:
+        """대기열에 자리가 있는지 (스트리밍 응답 시작 전 빠른 거절용)"""
+        return self._queue is None or not self._queue.full()
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def submit(self, fn: Callable) -> InferenceJob:
+        """작업을 대기열에 넣는다. fn(model, job)은 인스턴스 전용 스레드에서 실행된다."""
+        self._ensure_started()
+        job = InferenceJob(fn, self._loop, self.deadline)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise QueueFullError(
+                f"추론 대기열이 가득 찼습니다 (최대 {self.max_queue}건)",
+                retry_after=max(1, int(self.queue_timeout // 2))
+            )
+        self.stats["accepted"] += 1
+        self._loop.call_later(self.queue_timeout, self._expire, job)
+        return job
+
+    async def run(self, fn: Callable):
+        """작업을 제출하고 결과를 기다린다"""
+        job = self.submit(fn)
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            job.cancel()
+            raise
+
+    def _expire(self, job: InferenceJob):
+        if job.started_at is None and not job.future.done():
+            self.stats["timed_out"] += 1
+            job.future.set_exception(QueueTimeoutError(
+                f"추론 대기 시간 초과 ({self.queue_timeout:.0f}초)",
+                retry_after=max(1, int(self.queue_timeout))
+            ))
+
+    def _least_loaded(self) -> Optional[int]:
+        """빈 슬롯이 있는 인스턴스 중 실행 중 작업이 가장 적은(동률이면 누적 사용 시간이 적은) 것"""
+        free = [i for i, active in enumerate(self.instance_active) if active < self.slots_per_instance]
+        if not free:
+            return None
+        return min(free, key=lambda i: (self.instance_active[i], self.instance_stats[i]["busy_seconds"]))
+
+    async def _dispatch(self):
+        while True:
+            # 빈 인스턴스가 생길 때까지 기다린 뒤에 대기열에서 꺼낸다 (대기 중 만료 판정 유지)
+            while self._least_loaded() is None:
+                self._slot_freed.clear()
+                await self._slot_freed.wait()
+            job = await self._queue.get()
+            if job.future.done():  # 대기 중 만료되었거나 취소됨
+                continue
+            index = self._least_loaded()
+            job.started_at = time.monotonic()
+            self.active += 1
+            self.instance_active[index] += 1
+            self._loop.create_task(self._execute(index, job))
+
+    async def _execute(self, index: int, job: InferenceJob):
+        stats = self.instance_stats[index]
+        try:
+            result = await self._loop.run_in_executor(self._executors[index], job.fn, self.models[index], job)
+            self.stats["completed"] += 1
+            stats["completed"] += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        except Exception as e:
+            self.stats["failed"] += 1
+            stats["failed"] += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        finally:
+            self.active -= 1
+            self.instance_active[index] -= 1
+            job.finished_at = time.monotonic()
+            stats["busy_seconds"] += job.finished_at - job.started_at
+            stats["generated_tokens"] += job.generated_tokens
+            observe_inference_job(job)
+            self._slot_freed.set()
+
+    def get_status(self) -> dict:
+        return {
+            "workers": len(self.models),
+            "active": self.active,
+            "queue_depth": self.queue_depth(),
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "deadline": self.deadline,
+            **self.stats,
+            "instances": [
+                {
+                    "index": i,
+                    "cpus": self.cpu_sets[i],
+                    "active": self.instance_active[i],
+                    **{key: round(value, 2) if isinstance(value, float) else value for key, value in stats.items()}
+                }
+                for i, stats in enumerate(self.instance_stats)
+            ]
+        }
+
+
+class _BatchSequence:
+    """배치 디코딩 중인 요청 하나 (llama.cpp 시퀀스 ID 하나를 점유)"""
+
+    def __init__(self, job: InferenceJob, tokens: List[int], max_tokens: int, sampling: dict, out):
+        self.job = job
+        self.prompt_tokens = tokens
+        self.max_tokens = max_tokens
+        self.sampling = sampling
+        self.out = out  # 생성 텍스트 조각을 받는 queue.Queue (None = 종료)
+        self.seq_id: Optional[int] = None
+        self.n_past = 0  # KV에 들어간 토큰 수
+        self.generated: List[int] = []
+        self.pending_token: Optional[int] = None  # 다음 스텝에 평가할 마지막 샘플 토큰
+        self.text = ""
+        self.emitted = 0
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+
+    @property
+    def reserved_tokens(self) -> int:
+        return len(self.prompt_tokens) + self.max_tokens
+
+    @property
+    def prefilling(self) -> bool:
+        return self.n_past < len(self.prompt_tokens)
+
+
+class BatchEngine:
+    """모델 인스턴스 하나에서 여러 요청을 연속 배칭(continuous batching)으로 디코딩
+
+    전용 드라이버 스레드가 llama.cpp 저수준 API(llama_batch/llama_decode)로 한 컨텍스트를
+    돌리며, 요청마다 시퀀스 ID를 배정한다. 매 스텝 디코딩 중인 시퀀스의 토큰 1개씩과
+    남은 배치 용량만큼의 프롬프트 조각을 한 번에 평가하고, 요청은 스텝 단위로 합류/이탈한다.
+    동시 시퀀스 수와 예약 토큰 합(프롬프트 + max_tokens)을 제한해 KV 캐시가 넘치지 않게 한다.
+    """
+
+    def __init__(self, model, cpus: Optional[List[int]] = None, max_seqs: int = LLM_BATCH_MAX_SEQS,
+                 token_budget: int = LLM_BATCH_TOKEN_BUDGET):
+        import llama_cpp
+        import numpy as np
+
+        self.llama_cpp = llama_cpp
+        self.model = model
+        self.cpus = cpus
+        self.n_ctx = model.n_ctx()
+        self.n_batch = model.n_batch
+        self.n_vocab = model.n_vocab()
+        self.eos = model.token_eos()
+        self.max_seqs = max_seqs
+        self.token_budget = min(token_budget or self.n_ctx, self.n_ctx)
+        self.rng = np.random.default_rng()
+        self.stats = {"steps": 0, "batched_tokens": 0, "admitted": 0, "finished": 0, "max_concurrent": 0}
+        self._pending: "queue.Queue[_BatchSequence]" = queue.Queue()
+        self._waiting: List[_BatchSequence] = []
+        self._active: List[_BatchSequence] = []
+        self._free_seq_ids = list(range(max_seqs))
+        self._reserved = 0
+        self._batch = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def stream(self, job: InferenceJob, prompt: str, max_tokens: int, sampling: dict) -> Iterator[str]:
+        """요청을 엔진에 넣고 생성 조각을 순서대로 돌려준다 (스케줄러 실행 스레드에서 호출)"""
+        tokens = self.model.tokenize(prompt.encode("utf-8"))
+        if len(tokens) >= self.token_budget:
+            raise ValueError(f"프롬프트가 배치 토큰 예산보다 깁니다 ({len(tokens)} ≥ {self.token_budget})")
+        max_tokens = min(max_tokens, self.token_budget - len(tokens))
+        out: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._ensure_thread()
+        self._pending.put(_BatchSequence(job, tokens, max_tokens, sampling, out))
+        while True:
+            item = out.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="llm-batch-engine", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        if self.cpus:
+            _pin_current_thread(self.cpus)
+        ctx = self.model._ctx.ctx
+        # 고수준 API가 남긴 KV 상태를 비우고 이후 이 컨텍스트는 엔진만 사용
+        self.model.reset()
+        self.llama_cpp.llama_kv_cache_clear(ctx)
+        self._batch = self.llama_cpp.llama_batch_init(self.n_batch, 0, 1)
+        while True:
+            self._admit(block=not self._active and not self._waiting)
+            if not self._active:
+                continue
+            try:
+                self._step(ctx)
+            except Exception as e:
+                logger.error(f"배치 디코딩 오류: {e}")
+                for seq in list(self._active):
+                    self._finish(ctx, seq, error=e)
+
+    def _admit(self, block: bool):
+        """대기 요청을 시퀀스 수/토큰 예산 안에서 합류시킴 (먼저 온 요청 우선)"""
+        try:
+            while True:
+                self._waiting.append(self._pending.get(block=block))
+                block = False
+        except queue.Empty:
+            pass
+        while self._waiting:
+            seq = self._waiting[0]
+            if seq.job.should_stop():
+                self._waiting.pop(0)
+                seq.out.put(None)
+                continue
+            if not self._free_seq_ids or self._reserved + seq.reserved_tokens > self.token_budget:
+                break
+            self._waiting.pop(0)
+            seq.seq_id = self._free_seq_ids.pop(0)
+            self._reserved += seq.reserved_tokens
+            self._active.append(seq)
+            self.stats["admitted"] += 1
+        self.stats["max_concurrent"] = max(self.stats["max_concurrent"], len(self._active))
+
+    def _step(self, ctx):
+        """디코딩 토큰 + 프롬프트 조각을 한 배치로 평가하고 logits가 나온 시퀀스에서 샘플링"""
+        batch = self._batch
+        entries = []  # (배치 위치, 시퀀스) - logits를 읽을 항목
+        n = 0
+
+        def add(token: int, seq: _BatchSequence, want_logits: bool):
+            nonlocal n
+            batch.token[n] = token
+            batch.pos[n] = seq.n_past
+            batch.n_seq_id[n] = 1
+            batch.seq_id[n][0] = seq.seq_id
+            batch.logits[n] = 1 if want_logits else 0
+            if want_logits:
+                entries.append((n, seq))
+            seq.n_past += 1
+            n += 1
+
+        for seq in self._active:
+            if seq.job.should_stop():
+                continue
+            if seq.pending_token is not None:
+                add(seq.pending_token, seq, True)
+                seq.pending_token = None
+        for seq in self._active:
+            if seq.job.should_stop() or not seq.prefilling:
+                continue
+            chunk = seq.prompt_tokens[seq.n_past:seq.n_past + (self.n_batch - n)]
+            for token in chunk:
+                add(token, seq, seq.n_past == len(seq.prompt_tokens) - 1)
+            if n >= self.n_batch:
+                break
+
+        if n:
+            batch.n_tokens = n
+            result = self.llama_cpp.llama_decode(ctx, batch)
+            if result != 0:
+                raise RuntimeError(f"llama_decode 실패 (코드 {result})")
+            self.stats["steps"] += 1
+            self.stats["batched_tokens"] += n
+
+        for index, seq in entries:
+            self._sample(ctx, index, seq)
+        for seq in list(self._active):
+            if seq.job.should_stop():
+                self._finish(ctx, seq)
+
+    def _sample(self, ctx, index: int, seq: _BatchSequence):
+        import numpy as np
+
+        logits = np.ctypeslib.as_array(self.llama_cpp.llama_get_logits_ith(ctx, index), shape=(self.n_vocab,))
+        recent = (seq.prompt_tokens + seq.generated)[-64:]  # llama.cpp 기본 repeat_last_n
+        sampling = seq.sampling
+        token = sample_token(
+            logits, recent, self.rng, sampling["temperature"], sampling["top_k"], sampling["top_p"],
+            sampling["min_p"], sampling["repeat_penalty"]
+        )
+        seq.job.record_token()
+        if token == self.eos:
+            self._finish(ctx, seq)
+            return
+        seq.generated.append(token)
+        seq.text += seq.decoder.decode(self.model.detokenize([token]))
+
+        stops = seq.sampling.get("stop") or []
+        for stop in stops:
+            position = seq.text.find(stop)
+            if position != -1:
+                seq.text = seq.text[:position]
+                self._finish(ctx, seq)
+                return
+        if len(seq.generated) >= seq.max_tokens:
+            self._finish(ctx, seq)
+            return
+        # 정지 문자열의 앞부분일 수 있는 꼬리는 다음 토큰까지 보류
+        holdback = max((len(stop) - 1 for stop in stops), default=0)
+        self._emit(seq, len(seq.text) - holdback)
+        seq.pending_token = token
+
+    def _emit(self, seq: _BatchSequence, upto: int):
+        if upto > seq.emitted:
+            seq.out.put(seq.text[seq.emitted:upto])
+            seq.emitted = upto
+
+    def _finish(self, ctx, seq: _BatchSequence, error: Optional[Exception] = None):
+        if seq not in self._active:
+            return
+        self._active.remove(seq)
+        self.llama_cpp.llama_kv_cache_seq_rm(ctx, seq.seq_id, -1, -1)
+        self._free_seq_ids.append(seq.seq_id)
+        self._reserved -= seq.reserved_tokens
+        self.stats["finished"] += 1
+        if error is not None:
+            seq.out.put(error)
+        else:
+            self._emit(seq, len(seq.text))
+        seq.out.put(None)
+
+    def get_status(self) -> dict:
+        return {
+            "active": len(self._active),
+            "waiting": len(self._waiting) + self._pending.qsize(),
+            "reserved_tokens": self._reserved,
+            "token_budget": self.token_budget,
+            "max_seqs": self.max_seqs,
+            **self.stats
+        }
+
+
 class SimpleLLMManager:
     def __init__(self):
         self.model = None
+        self.models = []
+        self.scheduler = None
+        self.engines = {}  # 연속 배칭 사용 시 id(모델 인스턴스) → BatchEngine
         self.use_mock = True
         self.model_info = {
             "name": MODEL_NAME,
@@ -21,6 +595,9 @@ class SimpleLLMManager:
             "loaded": False,
             "error_message": None
         }
+        # (모델 인스턴스 id, 접두부 텍스트) → 접두부까지 평가한 LlamaState
+        self._prefix_states = {}
+        self.prefix_stats = {"builds": 0, "restores": 0, "reused_in_place": 0, "failures": 0}
         self._try_load_model()
 
     def _try_load_model(self):
@@ -28,11 +605,34 @@ class SimpleLLMManager:
             if not os.path.exists(MODEL_PATH):
                 raise FileNotFoundError(f"모델 파일 없음: {MODEL_PATH}")
 
-            self.model = Llama(
-                model_path=MODEL_PATH,
-                n_ctx=2048,
-                n_threads=4,  # 환경에 맞게 조절
-                verbose=False
+            # 워커마다 별도의 Llama 인스턴스 (가중치는 mmap으로 공유됨)
+            cpu_sets = plan_worker_cpus()
+            self.models = [
+                Llama(
+                    model_path=MODEL_PATH,
+                    n_ctx=LLM_N_CTX,
+                    n_threads=LLM_THREADS_PER_WORKER,
+                    n_threads_batch=LLM_THREADS_PER_WORKER,
+                    verbose=False
+                )
+                for _ in cpu_sets
+            ]
+            self.model = self.models[0]
+            pin = LLM_PIN_CPUS == "true" or (LLM_PIN_CPUS == "auto" and len(cpu_sets) > 1)
+            if LLM_BATCHING:
+                # 인스턴스마다 배치 엔진 스레드 하나가 디코딩을 맡고(여기에 CPU 고정),
+                # 스케줄러 슬롯은 엔진에 요청을 넘기고 결과를 기다리는 역할만 한다
+                self.engines = {
+                    id(model): BatchEngine(model, cpus if pin else None)
+                    for model, cpus in zip(self.models, cpu_sets)
+                }
+                self.scheduler = InferenceScheduler(self.models, slots_per_instance=LLM_BATCH_MAX_SEQS)
+            else:
+                self.scheduler = InferenceScheduler(self.models, cpu_sets=cpu_sets if pin else None)
+            logger.info(
+                f"🧵 LLM 인스턴스 {len(self.models)}개 (인스턴스당 스레드 {LLM_THREADS_PER_WORKER}, "
+                f"n_ctx {LLM_N_CTX}, CPU 고정 {'on' if pin else 'off'}, "
+                f"연속 배칭 {f'on, 시퀀스 {LLM_BATCH_MAX_SEQS}개' if LLM_BATCHING else 'off'})"
             )
 
             self.model_info.update({
@@ -54,29 +654,195 @@ class SimpleLLMManager:
             })
             self.use_mock = True
 
-    async def generate_response(self, prompt: str, max_tokens: int = 256) -> str:
+    async def generate_response(
+        self,
+        prompt: str,
+        max_tokens: int = 256,
+        prefix: Optional[str] = None,
+        stop_condition: Optional[Callable[[str], Optional[int]]] = None
+    ) -> str:
+        """prefix: prompt의 고정 앞부분(카테고리 시스템 프롬프트). KV 상태를 캐시해 재평가를 생략한다.
+        stop_condition: 누적 생성 텍스트를 받아 끝낼 위치(자를 글자 인덱스)나 None을 반환. 워커 스레드에서 호출된다.
+        """
         if self.use_mock or not self.model:
             return await self._mock_response(prompt)
 
+        return await self.scheduler.run(
+            lambda model, job: self._sync_generate(model, job, prompt, max_tokens, prefix, stop_condition)
+        )
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        max_tokens: int = 256,
+        prefix: Optional[str] = None,
+        stop_condition: Optional[Callable[[str], Optional[int]]] = None
+    ) -> AsyncIterator[str]:
+        """토큰 단위 스트리밍 생성 (llama-cpp stream=True)
+
+        추론은 스케줄러 워커 스레드에서 돌고, 생성된 조각은 asyncio.Queue를 통해
+        이벤트 루프로 넘겨받는다. 소비자가 중간에 끊으면 생성도 중단된다.
+        """
+        if self.use_mock or not self.model:
+            async for chunk in self._mock_stream(prompt):
+                yield chunk
+            return
+
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self._sync_generate, prompt, max_tokens)
+        queue: asyncio.Queue = asyncio.Queue()
+        end_marker = object()
 
-    def _sync_generate(self, prompt: str, max_tokens: int) -> str:
+        def _produce(model, job):
+            for chunk in self._sync_stream(model, job, prompt, max_tokens, prefix, stop_condition):
+                loop.call_soon_threadsafe(queue.put_nowait, chunk)
+
+        job = self.scheduler.submit(_produce)
+        # 작업이 끝나거나(정상/오류) 대기 중 만료되면 종료 표시
+        job.future.add_done_callback(lambda _: queue.put_nowait(end_marker))
         try:
-            response = self.model(
-                prompt,
-                max_tokens=max_tokens,
-                temperature=0.7,
-                top_p=0.9,
-                top_k=40,
-                repeat_penalty=1.1,
-                stop=["Q:", "User:"]
+            while True:
+                chunk = await queue.get()
+                if chunk is end_marker:
+                    break
+                yield chunk
+            job.future.result()  # 대기열 만료 등 오류 전파
+        finally:
+            job.cancel()
+
+    def count_tokens(self, text: str) -> int:
+        """프롬프트 토큰 수 (모델 토크나이저 사용, Mock 모드는 UTF-8 바이트 기준 근사)"""
+        if self.use_mock or not self.model:
+            # 한글은 글자당 1토큰, 영문은 3바이트당 1토큰 정도로 근사
+            return -(-len(text.encode("utf-8")) // 3)
+        return len(self.model.tokenize(text.encode("utf-8"), add_bos=False))
+
+    @property
+    def context_length(self) -> int:
+        """프롬프트 + 생성 토큰이 들어갈 컨텍스트 길이"""
+        return self.model.n_ctx() if self.model else LLM_N_CTX
+
+    def has_capacity(self) -> bool:
+        """추론 대기열에 자리가 있는지 (Mock 모드는 항상 True)"""
+        return self.scheduler is None or self.scheduler.has_capacity()
+
+    def _generation_kwargs(self, job: InferenceJob, max_tokens: int) -> dict:
+        """일반/스트리밍 생성에 공통으로 쓰는 샘플링 파라미터"""
+        def _on_token(input_ids, logits) -> bool:
+            # 토큰마다 호출되므로 TTFT/토큰 속도 측정에도 사용
+            job.record_token()
+            return job.should_stop()
+
+        return {
+            "max_tokens": max_tokens,
+            **SAMPLING_PARAMS,
+            # 취소/시한 초과 시 토큰 단위로 생성 중단
+            "stopping_criteria": StoppingCriteriaList([_on_token])
+        }
+
+    def warm_prefix_cache(self, prefixes: List[str]):
+        """모든 모델 인스턴스에 접두부 KV 상태를 미리 만들어 둠 (요청을 받기 전 시작 단계에서 호출)"""
+        if self.use_mock or not LLM_PREFIX_CACHE or self.engines:
+            return
+        start = time.monotonic()
+        for model in self.models:
+            for prefix in prefixes:
+                self._restore_prefix(model, prefix)
+        logger.info(f"🧠 접두부 KV 캐시 준비 완료: {len(self._prefix_states)}개 ({time.monotonic() - start:.1f}초)")
+
+    def _restore_prefix(self, model, prefix: Optional[str]):
+        """워커 스레드에서 생성 직전 호출: 접두부 KV 상태를 모델 컨텍스트에 올려 둔다
+
+        llama-cpp는 생성 시 현재 KV의 토큰과 프롬프트의 공통 접두부를 찾아 그 뒤만
+        평가하므로, 접두부 상태를 복원해 두면 검색 문맥과 질문만 새로 평가된다.
+        """
+        if not prefix or not LLM_PREFIX_CACHE or self.engines:
+            return
+        key = (id(model), prefix)
+        try:
+            state = self._prefix_states.get(key)
+            if state is None:
+                tokens = model.tokenize(prefix.encode("utf-8"))
+                model.reset()
+                model.eval(tokens)
+                state = model.save_state()
+                # 접두부 뒤 토큰을 평가하면 logits가 새로 계산되므로 마지막 행만 보관
+                # (전체 scores는 토큰 수 × 어휘 크기로 상태당 수십~수백 MB)
+                state.scores = state.scores[-1:].copy()
+                self._prefix_states[key] = state
+                self.prefix_stats["builds"] += 1
+                return
+            
+            # 직전 요청이 같은 접두부였다면 KV에 이미 있으므로 복사 생략
+            n = state.n_tokens
+            if model.n_tokens >= n and list(model.input_ids[:n]) == list(state.input_ids[:n]):
+                self.prefix_stats["reused_in_place"] += 1
+                return
+            model.load_state(state)
+            self.prefix_stats["restores"] += 1
+        except Exception as e:
+            self.prefix_stats["failures"] += 1
+            logger.warning(f"⚠️ 접두부 KV 캐시 사용 실패 (전체 프롬프트 평가로 진행): {e}")
+
+    def _iter_generation(self, model, job: InferenceJob, prompt: str, max_tokens: int,
+                         prefix: Optional[str], stop_condition) -> Generator[str, None, str]:
+        """생성 조각 이터레이터 (배치 엔진 또는 llama-cpp 스트리밍) + stop_condition 적용"""
+        if self.engines:
+            chunks = self.engines[id(model)].stream(job, prompt, max_tokens, SAMPLING_PARAMS)
+        else:
+            self._restore_prefix(model, prefix)
+            chunks = (
+                chunk["choices"][0]["text"]
+                for chunk in model(prompt, stream=True, **self._generation_kwargs(job, max_tokens))
             )
-            result = response["choices"][0]["text"]
-            return result.strip()
+
+        # 반환값: 종료 위치에서 잘린 최종 텍스트
+        return (yield from iter_until_stop(chunks, stop_condition, job.request_stop))
+
+    def _sync_generate(self, model, job: InferenceJob, prompt: str, max_tokens: int,
+                       prefix: Optional[str] = None, stop_condition=None) -> str:
+        try:
+            if self.engines or stop_condition:
+                # 내보낸 조각을 이어 붙이지 않고 제너레이터가 반환하는 최종 텍스트를 사용
+                generation = self._iter_generation(model, job, prompt, max_tokens, prefix, stop_condition)
+                while True:
+                    try:
+                        next(generation)
+                    except StopIteration as done:
+                        result = done.value
+                        break
+            else:
+                self._restore_prefix(model, prefix)
+                response = model(prompt, **self._generation_kwargs(job, max_tokens))
+                result = response["choices"][0]["text"]
         except Exception as e:
             logger.error(f"추론 오류: {e}")
             return f"추론 오류: {e}"
+        if job.deadline_exceeded():
+            # 잘린 답변을 정상 응답처럼 돌려주지 않음 (캐시/길이 통계에도 남지 않음)
+            raise self._deadline_error(job)
+        return result.strip()
+
+    def _sync_stream(self, model, job: InferenceJob, prompt: str, max_tokens: int,
+                     prefix: Optional[str] = None, stop_condition=None) -> Iterator[str]:
+        try:
+            yield from self._iter_generation(model, job, prompt, max_tokens, prefix, stop_condition)
+        except Exception as e:
+            # 오류 문구를 답변 조각으로 이어 보내면 일부 답변 + 오류가 정상 응답처럼 캐시되므로
+            # 예외로 넘겨 호출 측이 error 이벤트로 끝내게 함
+            logger.error(f"스트리밍 추론 오류: {e}")
+            raise
+        if job.deadline_exceeded():
+            # 이미 보낸 조각은 되돌릴 수 없으므로 오류로 끝내 호출 측이 잘린 답변임을 알게 함
+            raise self._deadline_error(job)
+
+    def _deadline_error(self, job: InferenceJob) -> QueueTimeoutError:
+        logger.warning(
+            f"⏱️ 처리 시한({self.scheduler.deadline:.0f}초) 초과로 생성 중단 ({job.generated_tokens}토큰 생성)"
+        )
+        return QueueTimeoutError(
+            f"추론 처리 시한 초과 ({self.scheduler.deadline:.0f}초)",
+            retry_after=max(1, int(self.scheduler.queue_timeout))
+        )
 
     async def _mock_response(self, prompt: str) -> str:
         await asyncio.sleep(0.2)
@@ -85,11 +851,29 @@ class SimpleLLMManager:
             return f"[Mock] 질문: {prompt} (실제 모델이 로드되지 않았습니다. 오류: {self.model_info['error_message']})"
         return f"[Mock] 질문: {prompt} (실제 모델이 로드되지 않았습니다.)"
 
+    async def _mock_stream(self, prompt: str) -> AsyncIterator[str]:
+        response = await self._mock_response(prompt)
+        # 실제 스트리밍과 비슷하게 어절 단위로 나누어 전달
+        for i, word in enumerate(response.split(" ")):
+            yield word if i == 0 else " " + word
+            await asyncio.sleep(0)
+
     def get_model_info(self):
         # Always include error_message if present
         return {
             **self.model_info,
-            "is_mock": self.use_mock
+            "is_mock": self.use_mock,
+            "scheduler": self.scheduler.get_status() if self.scheduler else None,
+            "batching": {
+                "enabled": bool(self.engines),
+                "engines": [engine.get_status() for engine in self.engines.values()]
+            },
+            "prefix_cache": {
+                "enabled": LLM_PREFIX_CACHE,
+                "states": len(self._prefix_states),
+                "bytes": sum(getattr(state, "llama_state_size", 0) for state in self._prefix_states.values()),
+                **self.prefix_stats
+            }
         }
 
     def is_model_loaded(self):
@@ -0,0 +1,158 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# prometheus_client는 선택 의존성: 없으면 모든 지표가 no-op으로 동작
+try:
+    from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    Counter = Gauge = Histogram = None
+    PROMETHEUS_AVAILABLE = False
+    logger.warning("⚠️ prometheus_client가 설치되지 않아 /metrics 지표 수집 비활성화")
+
+
+class _NoopMetric:
+    """prometheus_client 미설치 시 대체 지표 (호출은 받되 아무것도 기록하지 않음)"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+
+def _metric(metric_class, *args, **kwargs):
+    return metric_class(*args, **kwargs) if PROMETHEUS_AVAILABLE else _NoopMetric()
+
+
+# 요청 처리 경로 (수 ms 단계부터 수십 초 생성까지)
+_STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+RAG_STAGE_SECONDS = _metric(
+    Histogram,
+    "rag_stage_duration_seconds", "RAG 파이프라인 단계별 소요 시간 (classify/embed/search/prompt_build/generate)",
+    ["stage"], buckets=_STAGE_BUCKETS
+)
+RAG_REQUESTS_TOTAL = _metric(
+    Counter,
+    "rag_requests_total", "RAG 요청 수", ["mode", "outcome"]
+)
+RAG_PROMPT_TOKENS = _metric(
+    Histogram,
+    "rag_prompt_tokens", "생성에 넘기는 프롬프트 토큰 수 (검색 문서 패킹 후)",
+    buckets=(64, 128, 256, 384, 512, 768, 1024, 1280, 1536, 2048, 4096)
+)
+RAG_ANSWER_TOKENS = _metric(
+    Histogram,
+    "rag_answer_tokens", "생성된 답변 토큰 수", ["category"],
+    buckets=(32, 64, 128, 192, 256, 320, 384, 448, 512, 640, 768, 1024)
+)
+RAG_GENERATION_STOPS_TOTAL = _metric(
+    Counter,
+    "rag_generation_stops_total", "생성 종료 사유 (형식 완료 조기 종료 / 모델 자체 종료·길이 상한)", ["reason"]
+)
+
+# LLM 추론
+LLM_QUEUE_WAIT_SECONDS = _metric(
+    Histogram,
+    "llm_queue_wait_seconds", "추론 대기열 대기 시간", buckets=_STAGE_BUCKETS
+)
+LLM_TIME_TO_FIRST_TOKEN_SECONDS = _metric(
+    Histogram,
+    "llm_time_to_first_token_seconds", "대기열 진입부터 첫 토큰 생성까지 시간", buckets=_STAGE_BUCKETS
+)
+LLM_TOKENS_PER_SECOND = _metric(
+    Histogram,
+    "llm_tokens_per_second", "요청별 디코딩 속도 (첫 토큰 이후)",
+    buckets=(1, 2, 5, 10, 15, 20, 30, 50, 100, 200)
+)
+LLM_GENERATED_TOKENS_TOTAL = _metric(
+    Counter,
+    "llm_generated_tokens_total", "생성된 토큰 수"
+)
+LLM_QUEUE_DEPTH = _metric(Gauge, "llm_queue_depth", "추론 대기열 길이")
+LLM_ACTIVE_JOBS = _metric(Gauge, "llm_active_jobs", "실행 중인 추론 작업 수")
+
+# 임베딩 캐시 / 벡터 인덱스
+EMBEDDING_CACHE_HIT_RATIO = _metric(
+    Gauge, "embedding_cache_hit_ratio", "쿼리 임베딩 캐시 적중률"
+)
+EMBEDDING_CACHE_ENTRIES = _metric(
+    Gauge, "embedding_cache_entries", "쿼리 임베딩 캐시 항목 수"
+)
+VECTOR_INDEX_DOCUMENTS = _metric(
+    Gauge, "vector_index_documents", "카테고리 파티션별 문서 수", ["category"]
+)
+RESPONSE_CACHE_REQUESTS_TOTAL = _metric(
+    Counter, "response_cache_requests_total", "응답 캐시 조회 결과 (exact/semantic/miss)", ["result"]
+)
+RESPONSE_CACHE_ENTRIES = _metric(Gauge, "response_cache_entries", "응답 캐시 항목 수")
+PIPELINE_READY = _metric(Gauge, "rag_pipeline_ready", "모델 로딩 완료 여부 (1/0)")
+
+
+@contextmanager
+def time_stage(stage: str, timings: Optional[Dict[str, float]] = None):
+    """with 블록의 소요 시간을 rag_stage_duration_seconds{stage=...}에 기록 (timings가 있으면 ms로도 저장)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        RAG_STAGE_SECONDS.labels(stage).observe(elapsed)
+        if timings is not None:
+            timings[stage] = round(elapsed * 1000, 2)
+
+
+def observe_inference_job(job):
+    """스케줄러 워커가 작업을 끝낸 뒤 호출: 대기 시간, TTFT, 토큰 속도 기록"""
+    if job.started_at is None:
+        return
+    LLM_QUEUE_WAIT_SECONDS.observe(job.started_at - job.enqueued_at)
+    if job.first_token_at is None:
+        return
+    LLM_TIME_TO_FIRST_TOKEN_SECONDS.observe(job.first_token_at - job.enqueued_at)
+    LLM_GENERATED_TOKENS_TOTAL.inc(job.generated_tokens)
+    decode_seconds = (job.finished_at or time.monotonic()) - job.first_token_at
+    if job.generated_tokens > 1 and decode_seconds > 0:
+        LLM_TOKENS_PER_SECOND.observe((job.generated_tokens - 1) / decode_seconds)
+
+
+def collect_pipeline_state(pipeline_state):
+    """스크레이프 시점에 컴포넌트 상태를 게이지로 반영 (요청 경로에는 비용 없음)"""
+    PIPELINE_READY.set(1 if pipeline_state.is_ready() else 0)
+    if not pipeline_state.is_ready():
+        return
+    pipeline = pipeline_state.pipeline
+
+    scheduler = getattr(pipeline.llm_manager, "scheduler", None)
+    if scheduler is not None:
+        LLM_QUEUE_DEPTH.set(scheduler.queue_depth())
+        LLM_ACTIVE_JOBS.set(scheduler.active)
+
+    if pipeline.embedding_service:
+        cache_stats = pipeline.embedding_service.cache.get_stats()
+        EMBEDDING_CACHE_HIT_RATIO.set(cache_stats["hit_rate"])
+        EMBEDDING_CACHE_ENTRIES.set(cache_stats["entries"])
+
+    RESPONSE_CACHE_ENTRIES.set(pipeline.response_cache.get_stats()["entries"])
+
+    if pipeline.vector_store:
+        for category, ids in pipeline.vector_store.partition_ids.items():
+            VECTOR_INDEX_DOCUMENTS.labels(category).set(len(ids))
+
+
+def render_metrics():
+    """Prometheus 텍스트 형식 (본문, content-type) 반환"""
+    if not PROMETHEUS_AVAILABLE:
+        return b"# prometheus_client not installed\n", "text/plain; charset=utf-8"
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 모델 로딩 중 요청에 알려줄 재시도 간격 (초)
+PIPELINE_RETRY_AFTER = int(os.getenv("PIPELINE_RETRY_AFTER", "5"))
+# 헬스체크용 컴포넌트 상태 캐시 유지 시간 (초)
+HEALTH_STATUS_TTL = float(os.getenv("HEALTH_STATUS_TTL", "5"))
+
+
+class PipelineNotReadyError(Exception):
+    """모델이 아직 로딩 중이거나 로딩에 실패해 요청을 처리할 수 없음"""
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: int = PIPELINE_RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PipelineState:
+    """프로세스 전체에서 공유하는 RAGPipeline과 로딩 상태
+
+    앱 시작 시 load()를 백그라운드 작업으로 실행해 임베딩 모델/벡터 저장소/LLM을
+    별도 스레드에서 로딩한다. 그동안 서버는 포트를 열고 liveness에는 응답하지만,
+    readiness와 채팅 요청은 로딩이 끝날 때까지 503을 반환한다.
+    """
+
+    def __init__(self):
+        self.status = "starting"  # starting → loading → ready | failed
+        self.pipeline = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.load_started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self._health: Optional[dict] = None
+        self._health_at = 0.0
+
+    def is_ready(self) -> bool:
+        return self.status == "ready"
+
+    async def load(self):
+        """RAGPipeline을 스레드에서 생성 (이벤트 루프를 막지 않음)"""
+        if self.status in ("loading", "ready"):
+            return
+        from services.rag_pipeline import RAGPipeline
+
+        self._set_status("loading")
+        self.load_started_at = time.time()
+        logger.info("🔄 백그라운드 모델 로딩 시작...")
+        try:
+            self.pipeline = await asyncio.to_thread(RAGPipeline)
+            self.ready_at = time.time()
+            self._set_status("ready")
+            logger.info(f"✅ 모델 로딩 완료, 요청 수신 준비됨 ({self.ready_at - self.load_started_at:.1f}s)")
+        except Exception as e:
+            self.error = str(e)
+            self._set_status("failed")
+            logger.error(f"❌ 백그라운드 모델 로딩 실패: {e}")
+
+    def _set_status(self, status: str):
+        self.status = status
+        self._health = None  # 상태가 바뀌면 캐시된 헬스 정보 무효화
+
+    def get_health(self) -> dict:
+        """헬스체크 응답 (컴포넌트 상태는 HEALTH_STATUS_TTL 동안 캐시, 파이프라인 생성 없음)"""
+        now = time.monotonic()
+        if self._health is None or now - self._health_at >= HEALTH_STATUS_TTL:
+            self._health = self._build_health()
+            self._health_at = now
+        return self._health
+
+    def _build_health(self) -> dict:
+        if self.status == "failed":
+            return {
+                "status": "healthy",
+                "pipeline": self.status,
+                "model": "Not loaded",
+                "model_status": "error",
+                "message": f"API running, model loading failed: {(self.error or '')[:100]}"
+            }
+        if self.status != "ready":
+            return {
+                "status": "healthy",
+                "pipeline": self.status,
+                "model": "Not loaded",
+                "model_status": "loading",
+                "message": "API running, models loading"
+            }
+
+        health = {"status": "healthy", "pipeline": self.status, "message": "All systems operational"}
+        try:
+            model_info = self.pipeline.llm_manager.get_model_info()
+            health.update({"model": model_info["name"], "model_status": model_info["status"]})
+        except Exception as e:
+            logger.warning(f"LLM status check failed: {e}")
+            health.update({"model": "Unknown", "model_status": "error"})
+
+        embedding_service = self.pipeline.embedding_service
+        health["embedding"] = embedding_service.get_status()["status"] if embedding_service else "unavailable"
+        vector_store = self.pipeline.vector_store
+        health["documents"] = len(vector_store.documents) if vector_store else 0
+        return health
+
+    def get_pipeline(self):
+        """준비된 파이프라인 반환 (준비 전이면 PipelineNotReadyError)"""
+        if self.status == "ready":
+            return self.pipeline
+        if self.status == "failed":
+            raise PipelineNotReadyError(f"모델 로딩 실패: {self.error}")
+        raise PipelineNotReadyError("모델을 로딩하는 중입니다. 잠시 후 다시 시도해주세요.")
+
+    def get_status(self) -> dict:
+        load_seconds = None
+        if self.load_started_at:
+            load_seconds = round((self.ready_at or time.time()) - self.load_started_at, 2)
+        return {
+            "status": self.status,
+            "ready": self.is_ready(),
+            "error": self.error,
+            "uptime_seconds": round(time.time() - self.created_at, 2),
+            "load_seconds": load_seconds
+        }
+
+
+pipeline_state = PipelineState()
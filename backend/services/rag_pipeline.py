@@ -1,15 +1,42 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
 from services.category_router import CategoryRouter
 from services.embedding import EmbeddingService
 from services.vector_store import VectorStore
-from services.llm_manager import get_llm_manager
+from services.vector_data_loader import load_vector_data
+from services.llm_manager import get_llm_manager, InferenceRejectedError
+from services.response_cache import ResponseCache
+from services.context_budget import ContextBudgeter, PromptTooLongError, RAG_RETRIEVAL_TOP_K
+from services.generation_profile import AnswerFormatMonitor, LengthGovernor, get_profile, profile_category
+from services.metrics import (
+    time_stage, RAG_REQUESTS_TOTAL, RESPONSE_CACHE_REQUESTS_TOTAL, RAG_PROMPT_TOKENS,
+    RAG_ANSWER_TOKENS, RAG_GENERATION_STOPS_TOTAL
+)
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# 분류 신뢰도가 이 값 이상일 때만 해당 카테고리 파티션으로 검색 범위를 좁힘
+CATEGORY_SEARCH_MIN_CONFIDENCE = float(os.getenv("CATEGORY_SEARCH_MIN_CONFIDENCE", "0.5"))
+
+# 분류/검색/프롬프트 구성 등 CPU 단계를 실행할 스레드 수 (쿼리 임베딩은 마이크로배처 전용 스레드)
+RAG_STAGE_WORKERS = int(os.getenv("RAG_STAGE_WORKERS", "4"))
+
+# 생성 토큰 수 전역 상한(카테고리 프로필/길이 조절기가 이 안에서 정함)과, 토큰 수 오차(BOS 등)를 위한 여유분
+RAG_MAX_NEW_TOKENS = int(os.getenv("RAG_MAX_NEW_TOKENS", "768"))
+RAG_PROMPT_SAFETY_TOKENS = int(os.getenv("RAG_PROMPT_SAFETY_TOKENS", "8"))
+
+# 시스템 프롬프트가 있는 카테고리 (그 외는 health 프롬프트 사용)
+PROMPT_CATEGORIES = ("health", "travel", "investment", "legal")
+
 class RAGPipeline:
     def __init__(self):
         logger.info("🚀 RAG Pipeline 초기화 시작...")
+        # 요청 경로의 CPU 작업이 이벤트 루프를 막지 않도록 별도 스레드에서 실행
+        self._stage_executor = ThreadPoolExecutor(max_workers=RAG_STAGE_WORKERS, thread_name_prefix="rag-stage")
         
         try:
             self.category_router = CategoryRouter()
@@ -28,6 +55,10 @@ class RAGPipeline:
         try:
             self.vector_store = VectorStore(self.embedding_service)
             self._initialize_sample_data()
+            # scripts/generate_vector_data.py로 미리 만든 임베딩은 모델 호출 없이 적재
+            load_vector_data(self.vector_store, self.embedding_service)
+            # 첫 배치가 작아 flat으로 대체된 IVF 파티션은 모든 적재가 끝난 뒤 다시 학습
+            self.vector_store.rebuild_indexes()
             logger.info("✅ Vector Store 초기화 완료")
         except Exception as e:
             logger.error(f"❌ Vector Store 초기화 실패: {e}")
@@ -35,11 +66,21 @@ class RAGPipeline:
         
         try:
             self.llm_manager = get_llm_manager()
+            # 카테고리 시스템 프롬프트는 매 요청의 공통 접두부이므로 KV 상태를 미리 계산
+            self.llm_manager.warm_prefix_cache([self._get_system_prompt(c) for c in PROMPT_CATEGORIES])
             logger.info("✅ LLM Manager 초기화 완료")
         except Exception as e:
             logger.error(f"❌ LLM Manager 초기화 실패: {e}")
             self.llm_manager = None
         
+        # 응답 캐시: 프롬프트 템플릿이 바뀌면 버전이 달라져 기존 항목을 쓰지 않음
+        self.response_cache = ResponseCache()
+        self.prompt_version = self._compute_prompt_version()
+        # 검색 문서를 컨텍스트 길이 안에 맞춰 넣는 프롬프트 조립 단계
+        self.context_budgeter = ContextBudgeter(self._count_tokens)
+        # 카테고리별 최근 답변 길이로 max_tokens 조절
+        self.length_governor = LengthGovernor(cap=RAG_MAX_NEW_TOKENS)
+        
         logger.info("🚀 RAG Pipeline 초기화 완료")
     
     def _initialize_sample_data(self):
@@ -298,73 +339,340 @@ class RAGPipeline:
         texts = [doc["text"] for doc in sample_docs]
         metadata = [{"category": doc["category"], "topic": doc["topic"]} for doc in sample_docs]
         
-        self.vector_store.add_documents(texts, metadata)
-        logger.info(f"📚 샘플 데이터 {len(sample_docs)}개 추가 완료")
+        # 코퍼스/임베딩 모델이 바뀌지 않았으면 디스크 스냅샷을 그대로 사용
+        self.vector_store.load_or_build(texts, metadata)
+        logger.info(f"📚 샘플 데이터 {len(sample_docs)}개 준비 완료")
 
-    async def process_query(
-        self, 
-        query: str, 
-        category: Optional[str] = None,
-        user_id: Optional[str] = None
-    ) -> Dict[str, Any]:
-        """전체 RAG 파이프라인 처리"""
+    async def _prepare_prompt(self, query: str, category: Optional[str]) -> Dict[str, Any]:
+        """카테고리 분류 ∥ 쿼리 임베딩 → 응답 캐시 조회 → 벡터 검색 → 프롬프트 구성 (생성 직전 단계까지)
+
+        임베딩은 카테고리와 무관하므로 분류와 동시에 시작하고, CPU를 쓰는 단계는 모두
+        스레드 풀에서 실행해 이벤트 루프를 막지 않는다. 단계별 소요 시간은 "timings"(ms)에 담긴다.
+        캐시 적중 시 "cached"에 캐시 항목이 담기고 검색/프롬프트 구성은 생략된다.
+        """
+        timings: Dict[str, float] = {}
+        embed_task = None
+        if self.vector_store:
+            # 동시 요청의 쿼리 임베딩은 마이크로배처가 전용 스레드에서 한 번의 인코딩으로 묶음
+            embed_task = asyncio.ensure_future(self._embed_query(query, timings))
         try:
-            logger.info(f"📝 쿼리 처리 시작: {query[:50]}...")
-            
-            # 1. 카테고리 분류
+            # 1. 카테고리 분류 (사용자가 지정한 카테고리는 신뢰도 1.0)
+            confidence = 1.0
             if not category:
-                category = await self.category_router.classify_category(query)
-                logger.info(f"🏷️ 자동 분류된 카테고리: {category}")
+                category, confidence = await self._run_stage(
+                    "classify", timings, self.category_router.classify_with_confidence, query
+                )
+                logger.info(f"🏷️ 자동 분류된 카테고리: {category} (신뢰도: {confidence:.2f})")
             
-            # 2. 벡터 검색으로 관련 문서 찾기
-            relevant_docs = []
-            if self.vector_store:
-                relevant_docs = self.vector_store.search(query, top_k=3)
-                logger.info(f"🔍 관련 문서 {len(relevant_docs)}개 찾음")
+            prepared = {"category": category, "query_vec": None, "relevant_docs": [], "prompt": None, "prompt_tokens": 0,
+                        "max_tokens": self.length_governor.max_tokens(category), "cached": None, "timings": timings}
             
-            # 3. 카테고리별 프롬프트 구성
-            system_prompt = self._get_system_prompt(category)
+            # 응답 캐시 1단계: 정규화 질의 정확 일치 (임베딩 결과를 기다리지 않음)
+            self.response_cache.set_namespace(self._cache_namespace())
+            cached = self.response_cache.get_exact(query, category)
+            if cached:
+                RESPONSE_CACHE_REQUESTS_TOTAL.labels("exact").inc()
+                prepared["cached"] = {**cached, "tier": "exact"}
+                return prepared
             
-            # 4. 컨텍스트 구성 (관련 문서 포함)
-            context = ""
-            if relevant_docs and len(relevant_docs) > 0:
-                context = "\n참고 정보:\n"
-                for i, doc in enumerate(relevant_docs[:3]):  # 상위 3개 모두 사용
-                    context += f"{i+1}. {doc['text']}\n"
-                context += "\n"
-            else:
-                context = "\n참고 정보: 검색된 정보가 없으니 일반적인 조언을 드립니다.\n\n"
+            # 2. 벡터 검색으로 관련 문서 찾기 (신뢰도가 낮으면 전체 검색)
+            if embed_task:
+                prepared["query_vec"] = await embed_task
+                
+                # 응답 캐시 2단계: 질의 임베딩 유사도
+                cached = self.response_cache.get_semantic(prepared["query_vec"], category)
+                if cached:
+                    RESPONSE_CACHE_REQUESTS_TOTAL.labels("semantic").inc()
+                    prepared["cached"] = {**cached, "tier": "semantic"}
+                    return prepared
+                
+                search_category = category if confidence >= CATEGORY_SEARCH_MIN_CONFIDENCE else None
+                prepared["relevant_docs"] = await self._run_stage(
+                    "search", timings, self.vector_store.search_by_vector,
+                    prepared["query_vec"], RAG_RETRIEVAL_TOP_K, search_category
+                )
+                logger.info(f"🔍 관련 문서 {len(prepared['relevant_docs'])}개 찾음")
+            RESPONSE_CACHE_REQUESTS_TOTAL.labels("miss").inc()
             
-            # 5. 최종 프롬프트 생성
-            final_prompt = f"""{system_prompt}
+            prepared["relevant_docs"], prepared["prompt_tokens"], prepared["prompt"] = await self._run_stage(
+                "prompt_build", timings, self._assemble_prompt,
+                query, category, prepared["relevant_docs"], prepared["max_tokens"]
+            )
+            RAG_PROMPT_TOKENS.observe(prepared["prompt_tokens"])
+            return prepared
+        finally:
+            # 캐시 적중/오류로 임베딩 결과가 필요 없어진 경우 (인코딩 자체는 배처에서 끝까지 진행)
+            if embed_task and not embed_task.done():
+                embed_task.cancel()
+
+    async def _embed_query(self, query: str, timings: Dict[str, float]):
+        with time_stage("embed", timings):
+            return await self.embedding_service.encode_query(query)
+
+    async def _run_stage(self, stage: str, timings: Dict[str, float], fn, *args):
+        """CPU 단계를 파이프라인 전용 스레드 풀에서 실행하고 소요 시간 기록"""
+        with time_stage(stage, timings):
+            return await asyncio.get_running_loop().run_in_executor(self._stage_executor, fn, *args)
+
+    def _assemble_prompt(
+        self, query: str, category: str, relevant_docs: List[Dict[str, Any]], max_new_tokens: int
+    ) -> Tuple[List[Dict[str, Any]], int, str]:
+        """검색 문서 패킹 + 최종 프롬프트 (스테이지 스레드에서 실행)"""
+        docs, prompt_tokens = self._pack_context(query, category, relevant_docs, max_new_tokens)
+        return docs, prompt_tokens, self._build_prompt(query, category, docs)
+
+    def _count_tokens(self, text: str) -> int:
+        if self.llm_manager:
+            return self.llm_manager.count_tokens(text)
+        return -(-len(text.encode("utf-8")) // 3)
+
+    def _pack_context(
+        self, query: str, category: str, relevant_docs: List[Dict[str, Any]], max_new_tokens: int
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """컨텍스트 길이에서 고정 프롬프트와 생성 토큰을 뺀 자리에 검색 문서를 채움
+
+        질문만으로 생성 토큰 자리가 모자라면 PromptTooLongError(413).
+        반환: (패킹된 문서, 프롬프트 토큰 수 추정치)
+        """
+        # 문서 없는 프롬프트의 안내 문구는 "참고 정보:" 머리말보다 길어 보수적인 추정이 됨
+        fixed_tokens = self._count_tokens(self._build_prompt(query, category, []))
+        context_length = self.llm_manager.context_length if self.llm_manager else 2048
+        available = context_length - max_new_tokens - RAG_PROMPT_SAFETY_TOKENS - fixed_tokens
+        if available < 0:
+            self.context_budgeter.stats["rejected"] += 1
+            raise PromptTooLongError(
+                f"질문이 너무 깁니다. 질문을 줄여서 다시 시도해주세요. "
+                f"(프롬프트 {fixed_tokens} 토큰 + 답변 {max_new_tokens} 토큰 > 컨텍스트 {context_length} 토큰)"
+            )
+        packed, used = self.context_budgeter.pack(relevant_docs, available)
+        if len(packed) < len(relevant_docs):
+            logger.info(f"✂️ 참고 문서 {len(relevant_docs)}개 → {len(packed)}개 ({used}/{available} 토큰)")
+        return packed, fixed_tokens + used
+
+    def _cache_namespace(self) -> tuple:
+        """응답 캐시 무효화 기준: 코퍼스 버전, 프롬프트 버전, 모델, 임베딩 백엔드
+
+        임베딩 백엔드(torch/torch-int8/onnx)마다 질의 벡터가 조금씩 달라 의미 캐시 유사도가 어긋난다.
+        """
+        corpus_version = self.vector_store.corpus_version if self.vector_store else 0
+        model = self.llm_manager.model_info["name"] if self.llm_manager else None
+        is_mock = self.llm_manager.use_mock if self.llm_manager else True
+        embedding_backend = self.embedding_service.get_backend() if self.embedding_service else None
+        return (corpus_version, self.prompt_version, model, is_mock, embedding_backend)
+
+    def _compute_prompt_version(self) -> str:
+        """시스템 프롬프트와 프롬프트 템플릿 전체의 해시"""
+        parts = [self._get_system_prompt(c) for c in PROMPT_CATEGORIES]
+        parts.append(self._build_prompt("", "health", []))
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:12]
+
+    def _answer_monitor(self, category: str) -> AnswerFormatMonitor:
+        """요청마다 새로 만드는 형식 완료 감지기 (카테고리 프로필의 섹션 길이 상한 사용)"""
+        return AnswerFormatMonitor(get_profile(category)["action_max_chars"])
+
+    def _record_generation(self, category: str, response: str, monitor: AnswerFormatMonitor):
+        """답변 길이를 길이 조절기와 지표에 반영 (추론 오류 메시지는 제외)
+
+        처리 시한 초과나 스트리밍 중 오류는 LLM 매니저가 예외로 알리므로 여기까지 오지 않는다.
+        """
+        if not response or response.startswith("추론 오류") or self.llm_manager.use_mock:
+            return
+        # 요청에서 온 카테고리를 그대로 라벨로 쓰면 시계열이 무한히 늘 수 있으므로 프로필 키로 한정
+        category = profile_category(category)
+        tokens = self._count_tokens(response)
+        self.length_governor.record(category, tokens)
+        RAG_ANSWER_TOKENS.labels(category).observe(tokens)
+        RAG_GENERATION_STOPS_TOTAL.labels(monitor.reason or "model").inc()
+
+    def _cache_response(self, query: str, prepared: Dict[str, Any], response: str):
+        """정상 생성된 응답만 캐시 (추론 오류 메시지는 제외, 잘린 생성은 예외로 이 단계 전에 중단)"""
+        if not response or response.startswith("추론 오류"):
+            return
+        self.response_cache.put(query, prepared["category"], prepared["query_vec"], {
+            "response": response,
+            "relevant_docs_count": len(prepared["relevant_docs"])
+        })
+
+    def _build_prompt(self, query: str, category: str, relevant_docs: List[Dict[str, Any]]) -> str:
+        """시스템 프롬프트 + 검색 문서 + 질문으로 최종 프롬프트 구성"""
+        # 3. 카테고리별 프롬프트 구성
+        system_prompt = self._get_system_prompt(category)
+        
+        # 4. 컨텍스트 구성 (관련 문서 포함)
+        context = ""
+        if relevant_docs and len(relevant_docs) > 0:
+            context = "\n참고 정보:\n"
+            for i, doc in enumerate(relevant_docs):  # ContextBudgeter가 고른 문서 모두 사용
+                context += f"{i+1}. {doc['text']}\n"
+            context += "\n"
+        else:
+            context = "\n참고 정보: 검색된 정보가 없으니 일반적인 조언을 드립니다.\n\n"
+        
+        # 5. 최종 프롬프트 생성
+        final_prompt = f"""{system_prompt}
 
 {context}사용자 질문: {query}
 
 답변은 반드시 [요약], [상세 설명], [실천 조언] 형식의 3개 섹션으로 나누어 작성하고, 전체 길이가 300자 이상이 되도록 상세하게 작성해주세요.
 
 답변:"""
+        return final_prompt
+
+    async def process_query(
+        self, 
+        query: str, 
+        category: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """전체 RAG 파이프라인 처리"""
+        try:
+            logger.info(f"📝 쿼리 처리 시작: {query[:50]}...")
+            
+            prepared = await self._prepare_prompt(query, category)
+            category = prepared["category"]
+            using_real_embeddings = self.embedding_service.is_using_real_model() if self.embedding_service else False
+            
+            cached = prepared["cached"]
+            if cached:
+                logger.info(f"♻️ 응답 캐시 적중 ({cached['tier']}, 카테고리: {category})")
+                RAG_REQUESTS_TOTAL.labels("sync", "cached").inc()
+                return {
+                    "response": cached["response"],
+                    "category": category,
+                    "relevant_docs_count": cached["relevant_docs_count"],
+                    "using_real_embeddings": using_real_embeddings,
+                    "cached": cached["tier"],
+                    "timings_ms": prepared["timings"]
+                }
             
             # 6. LLM 응답 생성
-            response = await self.llm_manager.generate_response(
-                final_prompt, 
-                max_tokens=768
-            )
+            monitor = self._answer_monitor(category)
+            with time_stage("generate", prepared["timings"]):
+                response = await self.llm_manager.generate_response(
+                    prepared["prompt"], 
+                    max_tokens=prepared["max_tokens"],
+                    prefix=self._get_system_prompt(category),
+                    stop_condition=monitor
+                )
+            self._record_generation(category, response, monitor)
+            self._cache_response(query, prepared, response)
             
-            logger.info(f"✅ 응답 생성 완료 (카테고리: {category})")
+            logger.info(f"✅ 응답 생성 완료 (카테고리: {category}, 단계별 ms: {prepared['timings']})")
+            RAG_REQUESTS_TOTAL.labels("sync", "ok").inc()
             
             return {
                 "response": response,
                 "category": category,
-                "relevant_docs_count": len(relevant_docs),
-                "using_real_embeddings": self.embedding_service.is_using_real_model() if self.embedding_service else False
+                "relevant_docs_count": len(prepared["relevant_docs"]),
+                "using_real_embeddings": using_real_embeddings,
+                "timings_ms": prepared["timings"]
             }
             
+        except InferenceRejectedError as e:
+            # 과부하 거절은 라우터에서 429/503으로 변환
+            logger.warning(f"🚦 추론 요청 거절: {e}")
+            RAG_REQUESTS_TOTAL.labels("sync", "rejected").inc()
+            raise
+        except PromptTooLongError as e:
+            # 라우터에서 413으로 변환
+            logger.warning(f"📏 프롬프트 길이 초과: {e}")
+            RAG_REQUESTS_TOTAL.labels("sync", "too_long").inc()
+            raise
         except Exception as e:
             logger.error(f"❌ RAG 파이프라인 오류: {e}")
+            RAG_REQUESTS_TOTAL.labels("sync", "error").inc()
             return {
                 "response": f"죄송합니다. 처리 중 오류가 발생했습니다: {str(e)}",
                 "category": category or "general"
             }
+
+    async def process_query_stream(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """RAG 파이프라인 스트리밍 처리
+
+        이벤트 순서: meta(카테고리, 문서 수) → token(생성 조각, 여러 번) → done
+        오류가 나면 error 이벤트를 보내고 종료한다.
+        """
+        try:
+            logger.info(f"📝 스트리밍 쿼리 처리 시작: {query[:50]}...")
+            
+            prepared = await self._prepare_prompt(query, category)
+            category = prepared["category"]
+            cached = prepared["cached"]
+            
+            meta = {
+                "type": "meta",
+                "category": category,
+                "relevant_docs_count": cached["relevant_docs_count"] if cached else len(prepared["relevant_docs"]),
+                "using_real_embeddings": self.embedding_service.is_using_real_model() if self.embedding_service else False,
+                "timings_ms": prepared["timings"]
+            }
+            if cached:
+                # 캐시 적중: 전체 응답을 토큰 이벤트 하나로 전달
+                logger.info(f"♻️ 스트리밍 응답 캐시 적중 ({cached['tier']}, 카테고리: {category})")
+                RAG_REQUESTS_TOTAL.labels("stream", "cached").inc()
+                yield {**meta, "cached": cached["tier"]}
+                yield {"type": "token", "text": cached["response"]}
+                yield {"type": "done", "category": category}
+                return
+            yield meta
+            
+            first = True
+            chunks = []
+            monitor = self._answer_monitor(category)
+            with time_stage("generate", prepared["timings"]):
+                async for chunk in self.llm_manager.generate_stream(
+                    prepared["prompt"],
+                    max_tokens=prepared["max_tokens"],
+                    prefix=self._get_system_prompt(category),
+                    stop_condition=monitor
+                ):
+                    if first:
+                        # 일반 응답의 strip()과 맞추기 위해 앞 공백 제거
+                        chunk = chunk.lstrip()
+                        if not chunk:
+                            continue
+                        first = False
+                    chunks.append(chunk)
+                    yield {"type": "token", "text": chunk}
+            response = "".join(chunks).rstrip()
+            self._record_generation(category, response, monitor)
+            self._cache_response(query, prepared, response)
+            
+            logger.info(f"✅ 스트리밍 응답 완료 (카테고리: {category}, 단계별 ms: {prepared['timings']})")
+            RAG_REQUESTS_TOTAL.labels("stream", "ok").inc()
+            yield {"type": "done", "category": category}
+            
+        except InferenceRejectedError as e:
+            logger.warning(f"🚦 스트리밍 추론 요청 거절: {e}")
+            RAG_REQUESTS_TOTAL.labels("stream", "rejected").inc()
+            yield {
+                "type": "error",
+                "status": e.status_code,
+                "message": str(e),
+                "category": category or "general"
+            }
+        except PromptTooLongError as e:
+            logger.warning(f"📏 스트리밍 프롬프트 길이 초과: {e}")
+            RAG_REQUESTS_TOTAL.labels("stream", "too_long").inc()
+            yield {
+                "type": "error",
+                "status": e.status_code,
+                "message": str(e),
+                "category": category or "general"
+            }
+        except Exception as e:
+            logger.error(f"❌ RAG 스트리밍 파이프라인 오류: {e}")
+            RAG_REQUESTS_TOTAL.labels("stream", "error").inc()
+            yield {
+                "type": "error",
+                "message": f"죄송합니다. 처리 중 오류가 발생했습니다: {str(e)}",
+                "category": category or "general"
+            }
     
     def _get_system_prompt(self, category: str) -> str:
         """카테고리별 시스템 프롬프트 반환"""
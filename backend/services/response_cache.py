@@ -0,0 +1,148 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from services.embedding import EmbeddingCache
+
+logger = logging.getLogger(__name__)
+
+# 응답 캐시 설정
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))  # 최대 항목 수 (0이면 비활성화)
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))  # 항목 유효 시간 (초)
+RESPONSE_CACHE_SEMANTIC = os.getenv("RESPONSE_CACHE_SEMANTIC", "true").lower() == "true"
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95"))  # 의미 캐시 최소 코사인 유사도
+
+
+class ResponseCache:
+    """RAG 응답 캐시 (정확 일치 + 의미 유사도 2단계, TTL/LRU 제거)
+
+    정확 일치 키는 (정규화 질의, 카테고리)이고, 의미 캐시는 같은 카테고리 안에서
+    질의 임베딩의 코사인 유사도가 임계값 이상인 항목을 재사용한다.
+    코퍼스 버전/프롬프트 버전/모델/임베딩 백엔드가 묶인 namespace가 바뀌면 전체를 비운다.
+    이벤트 루프 스레드에서만 호출한다는 전제로 잠금은 두지 않는다.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESPONSE_CACHE_SIZE,
+        ttl: float = RESPONSE_CACHE_TTL,
+        semantic: bool = RESPONSE_CACHE_SEMANTIC,
+        similarity: float = RESPONSE_CACHE_SIMILARITY
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.semantic = semantic
+        self.similarity = similarity
+        self.namespace: Optional[tuple] = None
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidations": 0}
+        self._entries: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        # 카테고리별 의미 검색 행렬 (항목이 바뀌면 다시 쌓음)
+        self._matrices: Dict[str, Tuple[Any, list]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def set_namespace(self, namespace: tuple):
+        """코퍼스/프롬프트/모델 버전이 바뀌었으면 캐시 무효화"""
+        if namespace != self.namespace:
+            if self._entries:
+                self.stats["invalidations"] += 1
+                logger.info(f"🧹 응답 캐시 무효화 ({len(self._entries)}개 항목)")
+            self.clear()
+            self.namespace = namespace
+
+    def clear(self):
+        self._entries.clear()
+        self._matrices.clear()
+
+    @staticmethod
+    def _key(query: str, category: str) -> tuple:
+        return (EmbeddingCache.normalize(query), category)
+
+    def get_exact(self, query: str, category: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        key = self._key(query, category)
+        entry = self._entries.get(key)
+        if entry is None or self._expire_if_stale(key, entry):
+            return None
+        self._entries.move_to_end(key)
+        self.stats["exact_hits"] += 1
+        return entry
+
+    def get_semantic(self, query_vec, category: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled or not self.semantic or query_vec is None:
+            self.stats["misses"] += 1
+            return None
+        import numpy as np
+
+        matrix, keys = self._category_matrix(category)
+        if not keys:
+            self.stats["misses"] += 1
+            return None
+        scores = matrix @ np.asarray(query_vec, dtype=np.float32)
+        # 임계값 이상인 후보를 유사도 순으로 확인 (가장 가까운 항목이 만료됐으면 다음 후보 사용)
+        candidates = np.flatnonzero(scores >= self.similarity)
+        for position in candidates[np.argsort(-scores[candidates], kind="stable")]:
+            key = keys[position]
+            entry = self._entries.get(key)
+            if entry is None or self._expire_if_stale(key, entry):
+                continue
+            self._entries.move_to_end(key)
+            self.stats["semantic_hits"] += 1
+            return entry
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, query: str, category: str, query_vec, value: Dict[str, Any]):
+        if not self.enabled:
+            return
+        import numpy as np
+
+        key = self._key(query, category)
+        vector = None
+        if query_vec is not None:
+            vector = np.asarray(query_vec, dtype=np.float32)
+            vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+        self._entries[key] = {**value, "vector": vector, "created_at": time.monotonic()}
+        self._entries.move_to_end(key)
+        self._matrices.pop(category, None)
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            self._matrices.pop(old_key[1], None)
+            self.stats["evictions"] += 1
+
+    def _expire_if_stale(self, key: tuple, entry: Dict[str, Any]) -> bool:
+        if time.monotonic() - entry["created_at"] <= self.ttl:
+            return False
+        del self._entries[key]
+        self._matrices.pop(key[1], None)
+        self.stats["expired"] += 1
+        return True
+
+    def _category_matrix(self, category: str):
+        """같은 카테고리 항목의 질의 벡터를 (n, dim) 행렬로 (캐시된 것이 있으면 재사용)"""
+        if category not in self._matrices:
+            import numpy as np
+
+            keys = [key for key, entry in self._entries.items() if key[1] == category and entry["vector"] is not None]
+            matrix = np.stack([self._entries[key]["vector"] for key in keys]) if keys else None
+            self._matrices[category] = (matrix, keys)
+        return self._matrices[category]
+
+    def get_stats(self) -> dict:
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        total = hits + self.stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "semantic": self.semantic,
+            "similarity": self.similarity,
+            **self.stats,
+            "hit_rate": round(hits / total, 4) if total else 0.0
+        }
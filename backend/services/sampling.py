@@ -0,0 +1,57 @@
+from typing import List
+
+
+def _softmax(logits):
+    import numpy as np
+
+    exp = np.exp(logits - logits.max())
+    return exp / exp.sum()
+
+
+def candidate_tokens(logits, top_k: int, top_p: float, min_p: float):
+    """top-k → top-p → min-p 필터를 거친 후보 토큰 id (logit 내림차순, 최소 1개)
+
+    llama.cpp의 llama_sample_top_k / top_p / min_p와 같은 규칙이다.
+    top-p와 min-p의 확률은 temperature 적용 전 logit으로 그 시점 후보만의 softmax를 취한다.
+    """
+    import numpy as np
+
+    n = len(logits)
+    k = n if top_k <= 0 else min(top_k, n)
+    ids = np.argpartition(-logits, k - 1)[:k] if k < n else np.arange(n)
+    ids = ids[np.argsort(-logits[ids], kind="stable")]
+
+    if top_p < 1.0:
+        # 누적 확률이 처음으로 top_p 이상이 되는 토큰까지 포함
+        keep = int(np.searchsorted(np.cumsum(_softmax(logits[ids])), top_p)) + 1
+        ids = ids[:keep]
+
+    if min_p > 0.0 and len(ids) > 1:
+        # 가장 높은 확률의 min_p배 미만인 첫 토큰부터 제외
+        probs = _softmax(logits[ids])
+        below = np.flatnonzero(probs[1:] < min_p * probs[0])
+        if len(below):
+            ids = ids[:below[0] + 1]
+    return ids
+
+
+def sample_token(logits, recent_tokens: List[int], rng, temperature: float, top_k: int, top_p: float,
+                 min_p: float, repeat_penalty: float) -> int:
+    """NumPy 샘플링 (llama-cpp-python 0.2.56 Llama.sample과 같은 순서)
+
+    반복 패널티 → top-k → top-p → min-p → temperature → 추출.
+    tail-free/typical 샘플링은 기본값(1.0)에서 아무것도 거르지 않으므로 생략한다.
+    """
+    import numpy as np
+
+    logits = np.array(logits, dtype=np.float32)
+    if repeat_penalty != 1.0 and recent_tokens:
+        ids = np.fromiter(set(recent_tokens), dtype=np.int64)
+        values = logits[ids]
+        logits[ids] = np.where(values > 0, values / repeat_penalty, values * repeat_penalty)
+    if temperature <= 0:
+        return int(np.argmax(logits))
+
+    candidates = candidate_tokens(logits, top_k, top_p, min_p)
+    probs = _softmax(logits[candidates] / temperature).astype(np.float64)
+    return int(candidates[rng.choice(len(candidates), p=probs / probs.sum())])
@@ -0,0 +1,168 @@
+import logging
+import json
+import os
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# scripts/generate_vector_data.py가 생성하는 사전 계산 벡터 위치
+VECTOR_DATA_DIR = os.getenv("VECTOR_DATA_DIR", str(Path(__file__).parent.parent / "vector_data"))
+
+
+def _model_basename(model_name: str) -> str:
+    """'sentence-transformers/all-MiniLM-L6-v2' → 'all-MiniLM-L6-v2'"""
+    return (model_name or "").rstrip("/").split("/")[-1]
+
+
+def _load_yaml_metadata(meta_file: Path) -> Optional[Dict[str, Any]]:
+    import yaml
+
+    with open(meta_file, encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def _check_compatibility(meta: Dict[str, Any], embedding_service) -> Optional[str]:
+    """메타데이터의 임베딩 모델/차원이 현재 EmbeddingService와 맞는지 확인 (불일치 사유 반환)"""
+    live_model = _model_basename(embedding_service.model_name)
+    file_model = _model_basename(meta.get("embedding_model", ""))
+    if file_model != live_model:
+        return f"임베딩 모델 불일치 (파일: {file_model}, 현재: {live_model})"
+
+    live_dim = embedding_service.get_embedding_dim()
+    if meta.get("embedding_dim") != live_dim:
+        return f"임베딩 차원 불일치 (파일: {meta.get('embedding_dim')}, 현재: {live_dim})"
+
+    if bool(meta.get("using_real_model", True)) != embedding_service.is_using_real_model():
+        return "실제 모델/Mock 임베딩 여부 불일치"
+
+    return None
+
+
+def _record_metadata(record: Dict[str, Any]) -> Dict[str, Any]:
+    tags = record.get("tags", [])
+    return {
+        "category": record["category"],
+        "topic": tags[0] if tags else "",
+        "tags": tags,
+        "id": record.get("id"),
+        "source": "vector_data"
+    }
+
+
+def _read_json_vectors(vectors_file: Path) -> Tuple[Any, List[Dict[str, Any]]]:
+    import numpy as np
+
+    with open(vectors_file, encoding="utf-8") as f:
+        records = json.load(f)
+    embeddings = np.array([record["embedding"] for record in records], dtype=np.float32)
+    return embeddings, records
+
+
+def _read_binary_vectors(vectors_file: Path) -> Tuple[Any, List[Dict[str, Any]]]:
+    """바이너리 형식: {category}_vectors.npy (행렬) + {category}_documents.json (행 순서 문서)
+
+    행렬은 읽기 전용 np.memmap으로 열어 힙에 복사하지 않는다. 같은 파일을 여는
+    uvicorn 워커들은 OS 페이지 캐시의 사본 하나를 공유한다.
+    """
+    import numpy as np
+
+    documents_file = vectors_file.with_name(vectors_file.name.replace("_vectors.npy", "_documents.json"))
+    with open(documents_file, encoding="utf-8") as f:
+        records = json.load(f)
+    embeddings = np.load(vectors_file, mmap_mode="r")
+    if embeddings.dtype not in (np.float32, np.float16):
+        raise ValueError(f"지원하지 않는 벡터 dtype: {embeddings.dtype}")
+    if embeddings.shape[0] != len(records):
+        raise ValueError(f"벡터 행 수({embeddings.shape[0]})와 문서 수({len(records)})가 다릅니다")
+    return embeddings, records
+
+
+def _select_vectors_file(binary_file: Path, json_file: Path) -> Optional[Path]:
+    """바이너리/JSON 벡터 중 읽을 파일 (둘 다 있으면 더 최근에 생성된 쪽)
+
+    형식을 바꿔 다시 생성하면 이전 형식 파일이 남으므로 항상 바이너리를 우선하면
+    오래된 벡터를 읽게 된다. 바이너리는 문서 사이드카까지 포함한 수정 시각으로 비교한다.
+    """
+    if not binary_file.exists():
+        return json_file if json_file.exists() else None
+    if not json_file.exists():
+        return binary_file
+
+    documents_file = binary_file.with_name(binary_file.name.replace("_vectors.npy", "_documents.json"))
+    binary_mtime = max(
+        binary_file.stat().st_mtime,
+        documents_file.stat().st_mtime if documents_file.exists() else 0
+    )
+    newer = json_file if json_file.stat().st_mtime > binary_mtime else binary_file
+    logger.warning(
+        f"⚠️ {binary_file.name}와 {json_file.name}가 함께 있어 최근 파일({newer.name})을 사용합니다 "
+        f"(오래된 형식 파일은 지우세요)"
+    )
+    return newer
+
+
+def load_vector_data(vector_store, embedding_service, data_dir: Optional[str] = None) -> int:
+    """vector_data 디렉토리의 사전 계산 임베딩을 VectorStore에 일괄 적재
+
+    카테고리마다 {category}_metadata.yaml을 읽어 현재 임베딩 모델/차원과
+    비교하고, 일치하는 경우에만 바이너리(.npy) 또는 JSON 벡터(둘 다 있으면 최근 파일)를
+    모델 호출 없이 인덱스에 추가한다. 적재한 문서 수를 반환한다.
+    """
+    import numpy as np
+
+    data_path = Path(data_dir or VECTOR_DATA_DIR)
+    if not data_path.is_dir():
+        logger.info(f"ℹ️ 사전 계산 벡터 디렉토리 없음: {data_path}")
+        return 0
+
+    try:
+        import yaml
+    except ImportError:
+        logger.warning("⚠️ PyYAML이 설치되지 않아 벡터 메타데이터를 읽을 수 없습니다")
+        return 0
+
+    loaded = 0
+    for meta_file in sorted(data_path.glob("*_metadata.yaml")):
+        category = meta_file.name[:-len("_metadata.yaml")]
+        try:
+            meta = _load_yaml_metadata(meta_file)
+            if not meta:
+                logger.warning(f"⚠️ {category} 메타데이터가 비어 있어 건너뜀: {meta_file.name}")
+                continue
+
+            reason = _check_compatibility(meta, embedding_service)
+            if reason:
+                logger.warning(f"⚠️ {category} 사전 계산 벡터 건너뜀: {reason}")
+                continue
+
+            vectors_file = _select_vectors_file(
+                data_path / f"{category}_vectors.npy",
+                data_path / f"{category}_vectors.json"
+            )
+            if vectors_file is None:
+                logger.warning(f"⚠️ {category} 벡터 파일 없음")
+                continue
+            if vectors_file.suffix == ".npy":
+                embeddings, records = _read_binary_vectors(vectors_file)
+            else:
+                embeddings, records = _read_json_vectors(vectors_file)
+
+            # 생성 시 normalize_embeddings=True였지만 내적 검색 전제이므로 한 번 더 확인
+            # (정규화가 필요할 때만 복사본을 만들어 memmap 공유를 유지)
+            norms = np.sqrt(np.einsum("ij,ij->i", embeddings, embeddings, dtype=np.float32))
+            if not np.allclose(norms, 1.0, atol=1e-2):
+                embeddings = embeddings.astype(np.float32) / np.maximum(norms, 1e-12)[:, None]
+
+            vector_store.add_embeddings(
+                embeddings,
+                [record["text"] for record in records],
+                [_record_metadata(record) for record in records]
+            )
+            loaded += len(records)
+            logger.info(f"📥 {category} 사전 계산 벡터 {len(records)}개 적재")
+
+        except Exception as e:
+            logger.warning(f"⚠️ {category} 사전 계산 벡터 적재 실패: {e}")
+
+    return loaded
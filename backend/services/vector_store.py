@@ -1,16 +1,118 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import os
+import json
+import hashlib
+import shutil
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# 벡터 인덱스 스냅샷 저장 위치 및 포맷 버전
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "vector_index")
+SNAPSHOT_FORMAT_VERSION = 4
+
+# FAISS 인덱스 종류: flat(정확 검색) | hnsw | ivf | ivfpq (근사 검색)
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "flat").lower()
+INDEX_TYPES = ("flat", "hnsw", "ivf", "ivfpq")
+HNSW_M = int(os.getenv("VECTOR_HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("VECTOR_HNSW_EF_CONSTRUCTION", "80"))
+HNSW_EF_SEARCH = int(os.getenv("VECTOR_HNSW_EF_SEARCH", "64"))
+IVF_NLIST = int(os.getenv("VECTOR_IVF_NLIST", "0"))  # 0이면 학습 데이터 수에 맞춰 자동 결정
+IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "8"))
+PQ_M = int(os.getenv("VECTOR_PQ_M", "48"))  # 서브 벡터 수 (차원의 약수가 아니면 가까운 약수로 조정)
+PQ_NBITS = int(os.getenv("VECTOR_PQ_NBITS", "8"))
+IVF_MIN_POINTS_PER_LIST = 39  # FAISS 권장 최소 학습 포인트 수 (클러스터당)
+
+
+def _ivf_nlist(n_train: int) -> int:
+    """IVF 클러스터 수: 설정값 또는 4*sqrt(N), 학습 데이터로 감당 가능한 범위로 제한"""
+    nlist = IVF_NLIST or int(4 * n_train ** 0.5)
+    return max(1, min(nlist, n_train // IVF_MIN_POINTS_PER_LIST))
+
+
+def _pq_m(dimension: int) -> int:
+    """PQ 서브 벡터 수: 설정값 이하에서 차원을 나누어떨어지게 하는 가장 큰 값"""
+    return next(m for m in range(min(PQ_M, dimension), 0, -1) if dimension % m == 0)
+
+
+def _min_train_points(index_type: str) -> int:
+    """IVF 계열 학습에 필요한 최소 벡터 수 (그 외 종류는 0)"""
+    if index_type == "ivf":
+        return IVF_MIN_POINTS_PER_LIST
+    if index_type == "ivfpq":
+        return max(IVF_MIN_POINTS_PER_LIST, 2 ** PQ_NBITS)  # PQ 코드북 학습 최소량
+    return 0
+
+
+def planned_index_type(n_train: int, index_type: Optional[str] = None) -> str:
+    """n_train개 벡터로 만들 실제 인덱스 종류 (IVF 계열 학습 데이터가 부족하면 flat)"""
+    index_type = (index_type or VECTOR_INDEX_TYPE).lower()
+    return "flat" if n_train < _min_train_points(index_type) else index_type
+
+
+def create_faiss_index(dimension: int, n_train: int, index_type: Optional[str] = None):
+    """내적(코사인) 기반 FAISS 인덱스 생성
+
+    IVF 계열은 학습이 필요하므로 학습 데이터(n_train)가 부족하면
+    정확 검색(IndexFlatIP)으로 대체한다. 반환값은 (인덱스, 실제 종류)이다.
+    """
+    import faiss
+    
+    index_type = (index_type or VECTOR_INDEX_TYPE).lower()
+    metric = faiss.METRIC_INNER_PRODUCT
+    
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, HNSW_M, metric)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif index_type in ("ivf", "ivfpq"):
+        if planned_index_type(n_train, index_type) == "flat":
+            logger.info(f"ℹ️ {index_type} 학습 조건 미충족 (학습 벡터 {n_train}개), flat 인덱스 사용")
+            return faiss.IndexFlatIP(dimension), "flat"
+        nlist = _ivf_nlist(n_train)
+        quantizer = faiss.IndexFlatIP(dimension)
+        if index_type == "ivf":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, _pq_m(dimension), PQ_NBITS, metric)
+    elif index_type == "flat":
+        index = faiss.IndexFlatIP(dimension)
+    else:
+        raise ValueError(f"알 수 없는 VECTOR_INDEX_TYPE: {index_type}")
+    
+    set_search_params(index)
+    return index, index_type
+
+
+def set_search_params(index, ef_search: Optional[int] = None, nprobe: Optional[int] = None):
+    """검색 정확도/속도 파라미터 적용 (HNSW: efSearch, IVF: nprobe)"""
+    import faiss
+    
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search or HNSW_EF_SEARCH
+        return
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except Exception:
+        return  # IVF가 아닌 인덱스
+    ivf.nprobe = min(nprobe or IVF_NPROBE, ivf.nlist)
+
 class VectorStore:
     def __init__(self, embedding_service):
         self.embedding_service = embedding_service
         self.use_faiss = False
-        self.index = None
         self.documents = []
         self.document_metadata = []
+        # 카테고리별 파티션: FAISS 서브 인덱스와 파티션 행 → 전체 문서 번호 매핑
+        self.indexes = {}
+        self.index_types = {}  # 파티션별 실제 인덱스 종류 (IVF 학습 불가 시 flat)
+        self.partition_ids = {}
+        # FAISS 미사용 시 파티션별 정규화 float32 행렬 블록 (행 순서 = partition_ids)
+        # 추가된 벡터는 하나의 연속 행렬로 합치고, np.memmap 블록은 복사 없이 보관
+        self._partition_vectors = {}
+        self._partition_id_arrays = {}
+        # 문서가 추가/교체될 때마다 증가 (응답 캐시 무효화 기준)
+        self.corpus_version = 0
         
         # 실제 FAISS 초기화 시도
         logger.info("🔄 FAISS 벡터 데이터베이스 초기화 시도...")
@@ -23,44 +125,156 @@ class VectorStore:
             import numpy as np
             logger.info("📚 FAISS 라이브러리 확인됨")
             
-            # FAISS 인덱스 생성 (768차원으로 설정)
+            # 카테고리별 서브 인덱스는 문서가 들어올 때 생성 (768차원)
+            # 여기서는 인덱스 생성이 가능한지만 확인
+            if VECTOR_INDEX_TYPE not in INDEX_TYPES:
+                raise ValueError(f"알 수 없는 VECTOR_INDEX_TYPE: {VECTOR_INDEX_TYPE} (지원: {', '.join(INDEX_TYPES)})")
             dimension = self.embedding_service.get_embedding_dim()
-            self.index = faiss.IndexFlatIP(dimension)  # Inner Product (코사인 유사도)
+            faiss.IndexFlatIP(dimension)
             self.use_faiss = True
             
-            logger.info(f"✅ FAISS 벡터 데이터베이스 초기화 완료 (차원: {dimension})")
+            logger.info(f"✅ FAISS 벡터 데이터베이스 초기화 완료 (차원: {dimension}, 인덱스: {VECTOR_INDEX_TYPE})")
             
         except Exception as e:
             logger.warning(f"⚠️ FAISS 초기화 실패, 간단 벡터 저장소 사용: {e}")
             self.use_faiss = False
     
+    def _new_faiss_index(self, category: str, train_vectors=None):
+        """파티션 하나에 쓸 FAISS 인덱스 생성 (IVF 계열은 train_vectors로 학습)"""
+        n_train = 0 if train_vectors is None else len(train_vectors)
+        index, index_type = create_faiss_index(self.embedding_service.get_embedding_dim(), n_train)
+        if not index.is_trained:
+            logger.info(f"🧠 {index_type} 인덱스 학습 중 ({n_train}개 벡터)...")
+            index.train(train_vectors)
+        self.index_types[category] = index_type
+        return index
+    
+    @staticmethod
+    def _category_of(metadata: Dict[str, Any]) -> str:
+        return metadata.get("category") or "general"
+    
+    def _group_by_category(self, metadata: List[Dict[str, Any]]) -> Dict[str, List[int]]:
+        """배치 내 행 번호를 카테고리별로 묶음 (입력 순서 유지)"""
+        groups: Dict[str, List[int]] = {}
+        for i, meta in enumerate(metadata):
+            groups.setdefault(self._category_of(meta), []).append(i)
+        return groups
+    
+    def _add_to_partitions(self, embeddings_array, metadata: List[Dict[str, Any]]):
+        """배치를 카테고리별 파티션에 추가 (FAISS 서브 인덱스 또는 NumPy 행렬)"""
+        start = len(self.documents)
+        for category, rows in self._group_by_category(metadata).items():
+            if embeddings_array is not None:
+                # 연속 구간이면 슬라이스(뷰)로 가져와 memmap 공유 유지
+                if rows[-1] - rows[0] + 1 == len(rows):
+                    vectors = embeddings_array[rows[0]:rows[-1] + 1]
+                else:
+                    vectors = embeddings_array[rows]
+                if self.use_faiss:
+                    index = self.indexes.get(category)
+                    if index is None:
+                        # 파티션의 첫 배치로 근사 인덱스(IVF) 학습
+                        # (부족하면 flat으로 시작하고, 적재가 끝난 뒤 rebuild_indexes에서 재구성)
+                        index = self.indexes[category] = self._new_faiss_index(category, vectors)
+                    index.add(vectors)
+                else:
+                    self._append_vectors(category, vectors)
+            self.partition_ids.setdefault(category, []).extend(start + row for row in rows)
+            self._partition_id_arrays.pop(category, None)
+    
+    def _append_vectors(self, category: str, vectors):
+        """NumPy 백엔드: 파티션 행렬에 벡터 추가"""
+        import numpy as np
+        
+        blocks = self._partition_vectors.setdefault(category, [])
+        if isinstance(vectors, np.memmap):
+            blocks.append(vectors)  # 파일 매핑 그대로 보관 (워커 간 페이지 캐시 공유)
+        elif blocks and not isinstance(blocks[-1], np.memmap):
+            blocks[-1] = np.ascontiguousarray(np.vstack([blocks[-1], vectors]), dtype=np.float32)
+        else:
+            blocks.append(np.ascontiguousarray(vectors, dtype=np.float32))
+    
+    def _partition_id_array(self, category: str):
+        import numpy as np
+        
+        ids = self._partition_id_arrays.get(category)
+        if ids is None:
+            ids = self._partition_id_arrays[category] = np.asarray(self.partition_ids[category], dtype=np.int64)
+        return ids
+    
+    def _needs_rebuild(self, category: str, index) -> bool:
+        """파티션이 지금 크기로는 다른 인덱스(또는 더 많은 IVF 클러스터)를 써야 하는지"""
+        import faiss
+        
+        planned = planned_index_type(index.ntotal)
+        if self.index_types.get(category) != planned:
+            return True
+        if planned == "ivf":
+            # 작은 첫 배치로 학습해 클러스터가 너무 적은 경우 (IVF-PQ는 재구성 시 양자화 오차가 남아 제외)
+            return faiss.extract_index_ivf(index).nlist < _ivf_nlist(index.ntotal)
+        return False
+
+    def rebuild_indexes(self) -> int:
+        """파티션 크기에 맞지 않는 인덱스를 현재 VECTOR_INDEX_TYPE으로 재구성 (재구성한 파티션 수 반환)
+
+        IVF 계열은 파티션의 첫 배치로 학습하므로, 첫 배치가 작아 flat으로 대체됐거나
+        클러스터가 적게 잡힌 파티션을 모든 적재(샘플 코퍼스, vector_data)가 끝난 뒤 다시 학습시킨다.
+        """
+        if not self.use_faiss:
+            return 0
+        
+        import faiss
+        
+        rebuilt = 0
+        for category, index in list(self.indexes.items()):
+            if not self._needs_rebuild(category, index):
+                continue
+            try:
+                ivf = faiss.extract_index_ivf(index)
+                ivf.make_direct_map()
+            except Exception:
+                pass  # IVF가 아닌 인덱스는 바로 재구성 가능
+            vectors = index.reconstruct_n(0, index.ntotal)
+            new_index = self._new_faiss_index(category, vectors)
+            new_index.add(vectors)
+            self.indexes[category] = new_index
+            rebuilt += 1
+            logger.info(f"🔁 '{category}' 인덱스 재구성: {self.index_types[category]} ({new_index.ntotal}개)")
+        return rebuilt
+    
+    def categories(self) -> List[str]:
+        return list(self.partition_ids.keys())
+    
     def add_documents(self, texts: List[str], metadata: List[Dict[str, Any]]):
         """문서를 벡터 데이터베이스에 추가"""
         try:
             logger.info(f"📝 벡터 데이터베이스에 {len(texts)}개 문서 추가 중...")
             
             # 실제 임베딩 생성 (이미 normalize_embeddings=True로 정규화됨)
-            embeddings = self.embedding_service.encode(texts)
+            embeddings_array = self.embedding_service.encode_array(texts)
             
-            if self.use_faiss and embeddings:
-                try:
-                    import numpy as np
-                    import faiss
-                    
-                    embeddings_array = np.array(embeddings, dtype=np.float32)
-                    
-                    # 임베딩이 이미 정규화되어 있으므로 추가 정규화 불필요
-                    # (normalize_embeddings=True로 인해 이미 L2 정규화됨)
-                    
-                    # FAISS 인덱스에 추가
-                    self.index.add(embeddings_array)
+            if len(embeddings_array) == 0:
+                embeddings_array = None
+            else:
+                import numpy as np
+                
+                if not self.use_faiss:
+                    # NumPy 백엔드는 내적만 계산하므로 정규화를 한 번 더 보장
+                    norms = np.linalg.norm(embeddings_array, axis=1, keepdims=True)
+                    embeddings_array /= np.maximum(norms, 1e-12)
+            
+            try:
+                # 카테고리별 파티션(FAISS 서브 인덱스 또는 NumPy 행렬)에 추가
+                self._add_to_partitions(embeddings_array, metadata)
+                if embeddings_array is not None and self.use_faiss:
                     logger.info("✅ FAISS 인덱스에 문서 추가 완료")
-                except Exception as e:
-                    logger.warning(f"⚠️ FAISS 추가 실패: {e}")
+            except Exception as e:
+                logger.warning(f"⚠️ 벡터 추가 실패: {e}")
             
             # 문서와 메타데이터 저장
             self.documents.extend(texts)
             self.document_metadata.extend(metadata)
+            self.corpus_version += 1
             
             logger.info(f"✅ {len(texts)}개 문서 추가 완료")
             
@@ -68,8 +282,39 @@ class VectorStore:
             logger.error(f"❌ 문서 추가 실패: {e}")
             raise e
     
-    def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
-        """쿼리와 유사한 문서 검색"""
+    def add_embeddings(self, embeddings, texts: List[str], metadata: List[Dict[str, Any]]):
+        """미리 계산된 임베딩을 모델 호출 없이 추가 (정규화된 벡터 가정)
+
+        FAISS는 벡터를 자체 메모리에 복사하므로 float32로 변환해 넘기고,
+        FAISS가 없으면 np.memmap 행렬(float16 포함)은 복사 없이 그대로 보관한다.
+        """
+        import numpy as np
+        
+        embeddings = np.asanyarray(embeddings)
+        dimension = self.embedding_service.get_embedding_dim()
+        if embeddings.ndim != 2 or embeddings.shape != (len(texts), dimension):
+            raise ValueError(
+                f"임베딩 shape {embeddings.shape}가 문서 수/차원 ({len(texts)}, {dimension})과 맞지 않습니다"
+            )
+        if len(texts) != len(metadata):
+            raise ValueError("texts와 metadata 길이가 다릅니다")
+        
+        if self.use_faiss:
+            self._add_to_partitions(np.ascontiguousarray(embeddings, dtype=np.float32), metadata)
+        else:
+            self._add_to_partitions(embeddings, metadata)
+        
+        self.documents.extend(texts)
+        self.document_metadata.extend(metadata)
+        self.corpus_version += 1
+        logger.info(f"✅ 사전 계산 임베딩 {len(texts)}개 추가 완료 (모델 호출 없음)")
+    
+    def search(self, query: str, top_k: int = 3, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """쿼리와 유사한 문서 검색
+
+        category가 주어지고 해당 파티션이 있으면 그 파티션만 검색하고,
+        없으면 전체 파티션을 검색해 점수순으로 병합한다.
+        """
         try:
             if len(self.documents) == 0:
                 logger.warning("⚠️ 저장된 문서가 없습니다")
@@ -78,24 +323,40 @@ class VectorStore:
             logger.info(f"🔍 벡터 검색: '{query[:30]}...' (top_k={top_k})")
             
             # 실제 쿼리 임베딩 생성
-            query_embedding = self.embedding_service.encode([query])
-            if not query_embedding:
+            query_embedding = self.embedding_service.encode_array([query])
+            if len(query_embedding) == 0:
                 logger.error("❌ 쿼리 임베딩 생성 실패")
                 return []
             
-            query_vec = query_embedding[0]
+            return self.search_by_vector(query_embedding[0], top_k, category)
+            
+        except Exception as e:
+            logger.error(f"❌ 벡터 검색 실패: {e}")
+            return []
+    
+    def search_by_vector(self, query_vec, top_k: int = 3, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """이미 계산된 쿼리 임베딩으로 검색 (파티션 범위 규칙은 search와 동일)"""
+        try:
+            if len(self.documents) == 0:
+                logger.warning("⚠️ 저장된 문서가 없습니다")
+                return []
+            
+            if category and category not in self.partition_ids:
+                logger.info(f"ℹ️ '{category}' 파티션 없음, 전체 검색")
+                category = None
+            categories = [category] if category else self.categories()
             
-            if self.use_faiss and self.index:
+            if self.use_faiss and self.indexes:
                 try:
-                    results = self._faiss_search(query_vec, top_k)
+                    results = self._faiss_search(query_vec, top_k, categories)
                     if results:
                         logger.info(f"✅ FAISS 검색 완료: {len(results)}개 결과")
                         return results
                 except Exception as e:
                     logger.warning(f"⚠️ FAISS 검색 실패: {e}")
             
-            # 간단한 유사도 검색 (Fallback)
-            results = self._simple_similarity_search(query_vec, top_k)
+            # NumPy 행렬 검색 (FAISS 미사용 시)
+            results = self._simple_similarity_search(query_vec, top_k, categories)
             logger.info(f"✅ 간단 검색 완료: {len(results)}개 결과")
             return results
             
@@ -103,19 +364,29 @@ class VectorStore:
             logger.error(f"❌ 벡터 검색 실패: {e}")
             return []
     
-    def _faiss_search(self, query_vec: List[float], top_k: int) -> List[Dict[str, Any]]:
-        """FAISS를 사용한 검색"""
+    def _faiss_search(self, query_vec, top_k: int, categories: List[str]) -> List[Dict[str, Any]]:
+        """FAISS를 사용한 검색 (지정한 카테고리 파티션들의 결과를 점수순 병합)"""
         import numpy as np
-        import faiss
         
-        query_array = np.array([query_vec], dtype=np.float32)
+        # encode_array의 float32 행이면 복사 없이 (1, dim) 뷰만 만든다
+        query_array = np.ascontiguousarray(query_vec, dtype=np.float32).reshape(1, -1)
         # 쿼리 임베딩도 이미 정규화되어 있으므로 추가 정규화 불필요
         
-        # FAISS 검색
-        scores, indices = self.index.search(query_array, min(top_k, len(self.documents)))
+        # 파티션별 FAISS 검색
+        candidates = []
+        for category in categories:
+            index = self.indexes.get(category)
+            if index is None or index.ntotal == 0:
+                continue
+            ids = self.partition_ids[category]
+            scores, indices = index.search(query_array, min(top_k, index.ntotal))
+            for score, local_idx in zip(scores[0], indices[0]):
+                if 0 <= local_idx < len(ids):
+                    candidates.append((float(score), ids[local_idx]))
+        candidates.sort(reverse=True)
         
         results = []
-        for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
+        for i, (score, idx) in enumerate(candidates[:top_k]):
             if idx < len(self.documents) and idx >= 0:
                 results.append({
                     "text": self.documents[idx],
@@ -127,58 +398,241 @@ class VectorStore:
         
         return results
     
-    def _simple_similarity_search(self, query_embedding: List[float], top_k: int) -> List[Dict[str, Any]]:
-        """간단한 유사도 검색 (실제 임베딩 사용)"""
-        similarities = []
+    def _simple_similarity_search(
+        self, query_embedding, top_k: int, categories: List[str]
+    ) -> List[Dict[str, Any]]:
+        """NumPy 행렬 검색: 파티션별 행렬 곱 한 번 + argpartition으로 top-k 선택"""
+        import numpy as np
         
-        # 모든 문서와 유사도 계산
-        for i, doc in enumerate(self.documents):
-            try:
-                doc_embeddings = self.embedding_service.encode([doc])
-                if doc_embeddings:
-                    doc_embedding = doc_embeddings[0]
-                    similarity = self._cosine_similarity(query_embedding, doc_embedding)
-                    similarities.append((similarity, i))
-            except Exception as e:
-                logger.warning(f"⚠️ 문서 {i} 유사도 계산 실패: {e}")
-                similarities.append((0.0, i))
+        # 호출자의 배열(배치 행렬의 행일 수 있음)을 건드리지 않도록 새 배열로 정규화
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        
+        score_parts, id_parts = [], []
+        for category in categories:
+            blocks = self._partition_vectors.get(category)
+            if not blocks:
+                continue
+            score_parts.extend(self._block_scores(block, query) for block in blocks)
+            id_parts.append(self._partition_id_array(category))
+        if not score_parts:
+            return []
         
-        # 유사도 순으로 정렬
-        similarities.sort(reverse=True)
+        scores = np.concatenate(score_parts)
+        ids = np.concatenate(id_parts)
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
         
-        # 상위 k개 결과 반환
         results = []
-        for rank, (score, idx) in enumerate(similarities[:top_k]):
+        for rank, position in enumerate(top):
+            idx = int(ids[position])
             results.append({
                 "text": self.documents[idx],
                 "metadata": self.document_metadata[idx],
-                "score": float(score),
+                "score": float(scores[position]),
                 "rank": rank + 1,
                 "search_type": "simple"
             })
         
         return results
     
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        """코사인 유사도 계산"""
+    def _block_scores(self, block, query, chunk_rows: int = 8192):
+        """벡터 블록과 쿼리의 내적 (float16 블록은 청크 단위로 float32 변환)"""
+        import numpy as np
+        
+        if block.dtype == np.float32:
+            return block @ query
+        return np.concatenate([
+            block[i:i + chunk_rows].astype(np.float32) @ query
+            for i in range(0, len(block), chunk_rows)
+        ])
+    
+    @staticmethod
+    def corpus_fingerprint(texts: List[str], metadata: List[Dict[str, Any]]) -> str:
+        """코퍼스(문서+메타데이터) 내용 해시 - 변경 시 인덱스 재생성 판단용"""
+        payload = json.dumps({"texts": texts, "metadata": metadata}, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _embedding_key(self) -> str:
+        """스냅샷 키: 임베딩 모델명 + 차원 (Mock 벡터는 실제 모델과 구분)"""
+        model_name = self.embedding_service.model_name.replace("/", "__")
+        if not self.embedding_service.is_using_real_model():
+            model_name += "-mock"
+        return f"{model_name}_{self.embedding_service.get_embedding_dim()}"
+
+    def _backend_name(self) -> str:
+        return "faiss" if self.use_faiss else "numpy"
+
+    def snapshot_path(self, base_dir: Optional[str] = None) -> str:
+        return os.path.join(base_dir or VECTOR_INDEX_DIR, self._embedding_key())
+
+    def save_snapshot(self, fingerprint: str, base_dir: Optional[str] = None) -> bool:
+        """카테고리별 인덱스(FAISS) 또는 벡터 행렬(NumPy)과 문서/메타데이터를 디스크에 저장"""
+        if not self.partition_ids:
+            logger.info("ℹ️ 저장할 문서 없음 - 벡터 인덱스 스냅샷 저장 생략")
+            return False
+        
         try:
-            dot_product = sum(a * b for a, b in zip(vec1, vec2))
-            norm1 = sum(a * a for a in vec1) ** 0.5
-            norm2 = sum(b * b for b in vec2) ** 0.5
+            import numpy as np
             
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
+            path = self.snapshot_path(base_dir)
+            tmp_path = f"{path}.tmp-{os.getpid()}"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            os.makedirs(tmp_path)
             
-            return dot_product / (norm1 * norm2)
-        except:
-            return 0.0
-    
+            # 카테고리명은 파일명으로 쓰지 않고 manifest에서 순번 파일과 매핑
+            partitions = {}
+            for i, category in enumerate(self.partition_ids):
+                if self.use_faiss:
+                    import faiss
+                    
+                    index_file = f"index_{i}.faiss"
+                    faiss.write_index(self.indexes[category], os.path.join(tmp_path, index_file))
+                else:
+                    index_file = f"vectors_{i}.npy"
+                    matrix = np.concatenate(
+                        [np.asarray(block, dtype=np.float32) for block in self._partition_vectors[category]]
+                    )
+                    np.save(os.path.join(tmp_path, index_file), matrix)
+                partitions[category] = index_file
+            with open(os.path.join(tmp_path, "documents.json"), "w", encoding="utf-8") as f:
+                json.dump({"documents": self.documents, "metadata": self.document_metadata}, f, ensure_ascii=False)
+            
+            manifest = {
+                "format_version": SNAPSHOT_FORMAT_VERSION,
+                "embedding_model": self.embedding_service.model_name,
+                "embedding_dim": self.embedding_service.get_embedding_dim(),
+                "using_real_model": self.embedding_service.is_using_real_model(),
+                "embedding_backend": self.embedding_service.get_backend(),
+                "backend": self._backend_name(),
+                "index_type": VECTOR_INDEX_TYPE,
+                # 파티션별 실제 인덱스 종류 (학습 데이터 부족으로 flat 대체된 경우 포함)
+                "partition_index_types": dict(self.index_types) if self.use_faiss else {},
+                "corpus_fingerprint": fingerprint,
+                "document_count": len(self.documents),
+                "partitions": partitions,
+                "created_at": datetime.now().isoformat()
+            }
+            # manifest는 마지막에 기록 (manifest가 있으면 완전한 스냅샷)
+            with open(os.path.join(tmp_path, "manifest.json"), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+            logger.info(f"💾 벡터 인덱스 스냅샷 저장: {path} ({len(self.documents)}개 문서)")
+            return True
+            
+        except Exception as e:
+            logger.warning(f"⚠️ 벡터 인덱스 스냅샷 저장 실패: {e}")
+            return False
+
+    def load_snapshot(self, fingerprint: str, base_dir: Optional[str] = None) -> bool:
+        """저장된 스냅샷이 현재 모델/코퍼스와 일치하면 임베딩 없이 로드"""
+        path = self.snapshot_path(base_dir)
+        manifest_file = os.path.join(path, "manifest.json")
+        if not os.path.exists(manifest_file):
+            logger.info(f"ℹ️ 벡터 인덱스 스냅샷 없음: {path}")
+            return False
+        
+        try:
+            import numpy as np
+            
+            with open(manifest_file, encoding="utf-8") as f:
+                manifest = json.load(f)
+            
+            expected = {
+                "format_version": SNAPSHOT_FORMAT_VERSION,
+                "embedding_model": self.embedding_service.model_name,
+                "embedding_dim": self.embedding_service.get_embedding_dim(),
+                # torch/torch-int8/onnx는 같은 모델이라도 벡터가 조금씩 달라 섞어 쓰지 않음
+                "embedding_backend": self.embedding_service.get_backend(),
+                "backend": self._backend_name(),
+                "index_type": VECTOR_INDEX_TYPE,
+                "corpus_fingerprint": fingerprint
+            }
+            for key, value in expected.items():
+                if manifest.get(key) != value:
+                    logger.info(f"🔄 스냅샷 불일치({key}: {manifest.get(key)} → {value}), 인덱스 재생성")
+                    return False
+            
+            with open(os.path.join(path, "documents.json"), encoding="utf-8") as f:
+                stored = json.load(f)
+            
+            # 파티션 매핑은 추가 순서 그대로 메타데이터에서 복원
+            partition_ids: Dict[str, List[int]] = {}
+            for doc_id, meta in enumerate(stored["metadata"]):
+                partition_ids.setdefault(self._category_of(meta), []).append(doc_id)
+            
+            indexes, partition_vectors = {}, {}
+            index_types = manifest.get("partition_index_types", {})
+            for category, index_file in manifest.get("partitions", {}).items():
+                if self.use_faiss:
+                    import faiss
+                    
+                    # 저장 당시 flat으로 대체됐더라도 지금 설정/크기로 IVF를 만들 수 있으면 재생성
+                    planned = planned_index_type(len(partition_ids.get(category, [])))
+                    if index_types.get(category) != planned:
+                        logger.info(
+                            f"🔄 스냅샷 '{category}' 인덱스 종류 불일치({index_types.get(category)} → {planned}), 인덱스 재생성"
+                        )
+                        return False
+                    index = faiss.read_index(os.path.join(path, index_file))
+                    set_search_params(index)  # efSearch/nprobe는 현재 설정으로 적용
+                    shape = (index.ntotal, index.d)
+                    indexes[category] = index
+                else:
+                    # NumPy 백엔드는 행렬을 memmap으로 열어 워커 간 공유
+                    matrix = np.load(os.path.join(path, index_file), mmap_mode="r")
+                    shape = matrix.shape
+                    partition_vectors[category] = [matrix]
+                if shape != (len(partition_ids.get(category, [])), expected["embedding_dim"]):
+                    logger.warning(f"⚠️ 스냅샷 '{category}' 인덱스 크기가 문서 수와 맞지 않음, 인덱스 재생성")
+                    return False
+            if set(manifest.get("partitions", {})) != set(partition_ids):
+                logger.warning("⚠️ 스냅샷 파티션 구성이 문서와 맞지 않음, 인덱스 재생성")
+                return False
+            
+            self.indexes = indexes
+            self.index_types = {category: index_types[category] for category in indexes}
+            self._partition_vectors = partition_vectors
+            self._partition_id_arrays = {}
+            self.partition_ids = partition_ids
+            self.documents = stored["documents"]
+            self.document_metadata = stored["metadata"]
+            self.corpus_version += 1
+            logger.info(f"📂 벡터 인덱스 스냅샷 로드: {path} ({len(self.documents)}개 문서)")
+            return True
+            
+        except Exception as e:
+            logger.warning(f"⚠️ 벡터 인덱스 스냅샷 로드 실패, 재생성: {e}")
+            return False
+
+    def load_or_build(self, texts: List[str], metadata: List[Dict[str, Any]]):
+        """스냅샷이 유효하면 로드하고, 아니면 임베딩 후 스냅샷 저장"""
+        fingerprint = self.corpus_fingerprint(texts, metadata)
+        if self.load_snapshot(fingerprint):
+            return
+        
+        self.add_documents(texts, metadata)
+        self.rebuild_indexes()
+        self.save_snapshot(fingerprint)
+
     def get_stats(self) -> Dict[str, Any]:
         """벡터 데이터베이스 통계 반환"""
+        import numpy as np
+        
         return {
             "total_documents": len(self.documents),
             "embedding_dimension": self.embedding_service.get_embedding_dim(),
             "using_faiss": self.use_faiss,
+            "requested_index_type": VECTOR_INDEX_TYPE,
+            "partition_index_types": dict(self.index_types),
+            "mmap_vectors": sum(
+                len(block) for blocks in self._partition_vectors.values() for block in blocks
+                if isinstance(block, np.memmap)
+            ),
+            "partitions": {category: len(ids) for category, ids in self.partition_ids.items()},
             "using_real_embeddings": self.embedding_service.is_using_real_model(),
             "embedding_status": self.embedding_service.get_status()
         }
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 백엔드 경로 추가 (services 패키지 import)
+sys.path.insert(0, str(Path(__file__).parent.parent))
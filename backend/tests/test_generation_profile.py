@@ -0,0 +1,59 @@
+import pytest
+
+from services.generation_profile import (
+    DEFAULT_PROFILE, AnswerFormatMonitor, LengthGovernor, iter_until_stop, profile_category
+)
+
+ANSWER = (
+    "[요약]\n고혈압은 꾸준한 관리가 필요합니다.\n\n"
+    "[상세 설명]\n나트륨 섭취를 줄이고 운동을 하세요.\n\n"
+    "[실천 조언]\n- 하루 30분 걷기를 실천하세요.\n- 국물 요리를 줄이고 매일 혈압을 기록하세요."
+)
+
+
+def run(chunks):
+    stops = []
+    generation = iter_until_stop(chunks, AnswerFormatMonitor(450), lambda: stops.append(True))
+    emitted = []
+    while True:
+        try:
+            emitted.append(next(generation))
+        except StopIteration as done:
+            return "".join(emitted), done.value, bool(stops)
+
+
+@pytest.mark.parametrize("tail", [
+    ["\n", "질문", ":", " 당뇨는요?"],
+    ["\n", "사용자", " 질문", ":", " 당뇨는요?"],
+    ["[", "참고", "]", "\n병원에 가세요."],
+    [" ", "[", "주의", "사항", "]", " 무리하지 마세요."],
+])
+def test_header_split_across_chunks_is_not_emitted(tail):
+    emitted, final, stopped = run([ANSWER[i:i + 5] for i in range(0, len(ANSWER), 5)] + tail)
+    assert stopped
+    assert final.rstrip() == ANSWER
+    assert emitted == final
+    assert "[참고" not in emitted and "[주의" not in emitted and "질문" not in emitted[len(ANSWER):]
+
+
+def test_held_back_tail_is_released_when_it_is_not_a_header():
+    chunks = [ANSWER[i:i + 5] for i in range(0, len(ANSWER), 5)] + ["\n", "질문이", " 더 있으면 [1", "] 참고하세요."]
+    emitted, final, stopped = run(chunks)
+    assert not stopped
+    assert emitted == final == "".join(chunks)
+
+
+def test_without_stop_condition_everything_passes_through():
+    chunks = ["a", "[b", "\n", "c"]
+    generation = iter_until_stop(chunks, None, lambda: None)
+    assert list(generation) == chunks
+
+
+def test_unknown_categories_share_the_default_profile():
+    governor = LengthGovernor(min_samples=1)
+    for i in range(50):
+        governor.record(f"client-{i}", 100)
+    assert list(governor.get_stats()["categories"]) == [DEFAULT_PROFILE]
+    assert governor.max_tokens("no-such-category") == governor.max_tokens(DEFAULT_PROFILE)
+    assert profile_category("legal") == "legal"
+    assert profile_category(None) == DEFAULT_PROFILE
@@ -0,0 +1,24 @@
+import time
+
+import numpy as np
+
+from services.response_cache import ResponseCache
+
+
+def test_semantic_lookup_skips_expired_best_match():
+    cache = ResponseCache(max_entries=8, ttl=60, similarity=0.9)
+    query = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    cache.put("가장 가까운 질문", "health", query, {"response": "만료된 답변"})
+    cache.put("비슷한 질문", "health", np.array([0.95, 0.31, 0.0]), {"response": "유효한 답변"})
+    cache._entries[("가장 가까운 질문", "health")]["created_at"] = time.monotonic() - 120
+
+    entry = cache.get_semantic(query, "health")
+    assert entry is not None and entry["response"] == "유효한 답변"
+    assert cache.stats["expired"] == 1
+
+
+def test_semantic_lookup_misses_below_threshold():
+    cache = ResponseCache(max_entries=8, ttl=60, similarity=0.9)
+    cache.put("질문", "health", np.array([1.0, 0.0]), {"response": "답변"})
+    assert cache.get_semantic(np.array([0.0, 1.0], dtype=np.float32), "health") is None
+    assert cache.get_semantic(np.array([1.0, 0.0], dtype=np.float32), "travel") is None
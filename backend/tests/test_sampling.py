@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+import pytest
+
+from services.sampling import candidate_tokens, sample_token
+
+
+def _softmax(candidates):
+    top = candidates[0][1]
+    exps = [math.exp(logit - top) for _, logit in candidates]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+
+def reference_candidates(logits, top_k, top_p, min_p, min_keep=1):
+    """llama.cpp llama_sample_top_k → top_p → min_p 를 그대로 옮긴 기준 구현"""
+    candidates = sorted(enumerate(float(x) for x in logits), key=lambda c: -c[1])
+
+    k = len(candidates) if top_k <= 0 else top_k
+    k = min(max(k, min_keep), len(candidates))
+    candidates = candidates[:k]
+
+    if top_p < 1.0:
+        cum_sum, last = 0.0, len(candidates)
+        for i, p in enumerate(_softmax(candidates)):
+            cum_sum += p
+            if cum_sum >= top_p and i + 1 >= min_keep:
+                last = i + 1
+                break
+        candidates = candidates[:last]
+
+    if min_p > 0.0:
+        probs = _softmax(candidates)
+        i = 1
+        while i < len(candidates):
+            if probs[i] < min_p * probs[0] and i >= min_keep:
+                break
+            i += 1
+        candidates = candidates[:i]
+    return [token for token, _ in candidates]
+
+
+@pytest.mark.parametrize("top_k,top_p,min_p", [
+    (40, 0.9, 0.05),
+    (40, 0.9, 0.0),
+    (0, 0.95, 0.1),
+    (5, 1.0, 0.05),
+    (1000, 0.5, 0.0),
+])
+def test_candidates_match_llama_cpp_order(top_k, top_p, min_p):
+    rng = np.random.default_rng(0)
+    for scale in (0.5, 2.0, 5.0):
+        for _ in range(50):
+            logits = (rng.standard_normal(500) * scale).astype(np.float32)
+            expected = reference_candidates(logits, top_k, top_p, min_p)
+            assert candidate_tokens(logits, top_k, top_p, min_p).tolist() == expected
+
+
+def test_temperature_does_not_change_candidate_set():
+    # temperature는 후보를 고른 뒤 적용되므로 낮은 temperature에서도 후보 밖 토큰은 나오지 않음
+    logits = np.zeros(100, dtype=np.float32)
+    logits[:10] = np.linspace(5, 3, 10)
+    allowed = set(reference_candidates(logits, 40, 0.9, 0.05))
+    rng = np.random.default_rng(1)
+    for temperature in (0.2, 0.7, 1.5):
+        for _ in range(200):
+            assert sample_token(logits, [], rng, temperature, 40, 0.9, 0.05, 1.0) in allowed
+
+
+def test_repeat_penalty_and_greedy():
+    logits = np.array([1.0, 2.0, -1.0, 1.9], dtype=np.float32)
+    rng = np.random.default_rng(0)
+    assert sample_token(logits, [], rng, 0.0, 40, 0.9, 0.05, 1.1) == 1
+    # 양수 logit은 나누고 음수 logit은 곱함 (llama.cpp와 동일)
+    assert sample_token(logits, [1], rng, 0.0, 40, 0.9, 0.05, 1.1) == 3